@@ -2,6 +2,8 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import jwt
+from auth.cache import PrincipalCache
+from auth.hashing import PasswordHasher
 from controller import controller as crud
 from fastapi import (
     Depends,
@@ -9,33 +11,53 @@ from fastapi import (
     status,
 )
 from fastapi.security import OAuth2PasswordBearer
+from models.models import User
 from passlib.context import CryptContext
 from schemas import schemas
 from settings.database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 
 SECRET_KEY = "suachavesecretaaqui"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 120
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+PRINCIPAL_CACHE_MAX_SIZE = 10000
+PASSWORD_HASH_WORKERS = 4
+PASSWORD_HASH_MAX_PENDING = 64
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING
+)
+principal_cache = PrincipalCache(
+    maxsize=PRINCIPAL_CACHE_MAX_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS
+)
 
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
 
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.run(
+        pwd_context.verify, plain_password, hashed_password
+    )
+
 
+async def get_password_hash(password):
+    return await password_hasher.run(pwd_context.hash, password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = crud.get_user_by_username(db, username)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await crud.get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await verify_password(password, user.password):
         return False
     return user
 
@@ -52,8 +74,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ):
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -74,7 +100,9 @@ async def get_current_user(
     except jwt.InvalidTokenError:
         raise credentials_exception
 
-    user = crud.get_user_by_username(db, token_data.username)
+    user = await crud.get_user_by_username(db, token_data.username)
     if user is None:
         raise credentials_exception
-    return user
+    principal = schemas.User.model_validate(user, from_attributes=True)
+    principal_cache.set(token, principal, token_exp=payload.get("exp"))
+    return principal
@@ -0,0 +1,59 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class PrincipalCache:
+    """LRU cache of authenticated users keyed by access token.
+
+    Entries live for ``ttl`` seconds or until the token itself expires,
+    whichever comes first.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, token: str):
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user, token_exp: Optional[float] = None):
+        now = time.monotonic()
+        expires_at = now + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, now + token_exp - time.time())
+        self._entries[token] = (expires_at, user)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        stale = [
+            token for token, (_, user) in self._entries.items() if user.id == user_id
+        ]
+        for token in stale:
+            del self._entries[token]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
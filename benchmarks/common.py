@@ -0,0 +1,112 @@
+import asyncio
+import time
+import uuid
+
+import httpx
+
+ALTERNATIVAS = [{"texto": t, "correta": t == "a"} for t in "abcd"]
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (seconds)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(name: str, samples, errors: int, seconds: float) -> str:
+    return (
+        f"{name}: {len(samples)} ok, {errors} errors in {seconds:.1f}s "
+        f"({len(samples) / seconds:.1f} req/s) "
+        f"p50={percentile(samples, 0.50) * 1000:.1f}ms "
+        f"p95={percentile(samples, 0.95) * 1000:.1f}ms "
+        f"p99={percentile(samples, 0.99) * 1000:.1f}ms"
+    )
+
+
+async def create_user(client: httpx.AsyncClient, password: str = "benchmark"):
+    """Register a throwaway user and return (username, auth headers)."""
+    username = f"bench-{uuid.uuid4().hex[:10]}"
+    response = await client.post(
+        "/users/",
+        json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        },
+    )
+    response.raise_for_status()
+    response = await client.post(
+        "/token", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    return username, {"Authorization": f"Bearer {token}"}
+
+
+async def seed_quiz(
+    client: httpx.AsyncClient, headers, temas: int, fases: int, perguntas: int
+):
+    """Create a quiz tree through the API and return the URLs to read."""
+    urls = ["/temas/", "/users/me/"]
+    for _ in range(temas):
+        tema = (
+            await client.post("/temas/", json={"nome": "Tema"}, headers=headers)
+        ).json()
+        urls.append(f"/temas/{tema['id']}")
+        for _ in range(fases):
+            fase = (
+                await client.post(
+                    f"/temas/{tema['id']}/fases/",
+                    json={"nome": "Fase"},
+                    headers=headers,
+                )
+            ).json()
+            urls += [f"/fases/{fase['id']}", f"/fases/{fase['id']}/perguntas/"]
+            for _ in range(perguntas):
+                pergunta = (
+                    await client.post(
+                        f"/fases/{fase['id']}/perguntas/",
+                        json={"texto": "Pergunta", "alternativas": ALTERNATIVAS},
+                        headers=headers,
+                    )
+                ).json()
+                urls.append(f"/perguntas/{pergunta['id']}")
+    return urls
+
+
+async def hammer(client: httpx.AsyncClient, requests, concurrency: int, seconds):
+    """Issue ``requests`` (a cycle of (method, url, kwargs)) from ``concurrency``
+    tasks until ``seconds`` elapse; return (latencies, errors, elapsed)."""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset: int):
+        nonlocal errors
+        index = offset
+        while time.perf_counter() < deadline:
+            method, url, kwargs = requests[index % len(requests)]
+            index += 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def new_client(url: str, concurrency: int) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    return httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
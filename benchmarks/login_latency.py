@@ -0,0 +1,51 @@
+"""Login latency while the rest of the API is under load.
+
+Keeps ``--load-concurrency`` clients on the authenticated read endpoints
+and, at the same time, ``--login-concurrency`` clients posting to /token,
+then reports both; the number to watch is the login p99 and whether the
+reads slow down while bcrypt runs:
+
+    python -m benchmarks.login_latency --url http://localhost:8000 \\
+        --load-concurrency 64 --login-concurrency 8 --seconds 20
+
+Run it once with ``--login-concurrency 0`` for the reads-only baseline.
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import create_user, hammer, new_client, seed_quiz, summarize
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.login_latency")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--load-concurrency", type=int, default=64)
+    parser.add_argument("--login-concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20)
+    args = parser.parse_args()
+
+    concurrency = args.load_concurrency + args.login_concurrency
+    async with new_client(args.url, concurrency) as client:
+        username, headers = await create_user(client, password="benchmark")
+        urls = await seed_quiz(client, headers, temas=3, fases=2, perguntas=3)
+        reads = [("GET", url, {"headers": headers}) for url in urls]
+        logins = [
+            (
+                "POST",
+                "/token",
+                {"data": {"username": username, "password": "benchmark"}},
+            )
+        ]
+        runs = [hammer(client, reads, args.load_concurrency, args.seconds)]
+        if args.login_concurrency:
+            runs.append(hammer(client, logins, args.login_concurrency, args.seconds))
+        results = await asyncio.gather(*runs)
+
+    print(summarize(f"reads x{args.load_concurrency}", *results[0]))
+    if args.login_concurrency:
+        print(summarize(f"logins x{args.login_concurrency}", *results[1]))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
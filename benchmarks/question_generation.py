@@ -0,0 +1,112 @@
+"""Chunked question generation against the single-prompt path.
+
+No model is called: ``predict`` is replaced by a simulated one that only
+reads the first ``--context-tokens`` of its prompt, takes time proportional
+to the tokens it reads and the questions it writes, and writes each
+question about a page it actually saw. The document is ``--pages`` synthetic
+pages, each tagged with its number, so coverage can be measured as the share
+of the document's tenths that the final questions come from:
+
+    python -m benchmarks.question_generation --pages 300
+
+Both paths run the real code from services.json_llm (prompting, parsing,
+chunking, concurrency, merging); only the model and the cache are stubbed.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+
+import services.json_llm as json_llm
+from services.default_json import padronizar_json
+
+PAGE_TAG = re.compile(r"pagina(\d+)\b")
+QUANTIDADE = re.compile(r"gere exatamente (\d+) perguntas")
+
+
+class NullCache:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value):
+        pass
+
+
+def simulated_model(context_tokens: int, ms_per_1k_tokens: float, ms_per_question):
+    def predict(prompt: str):
+        visible = prompt[: context_tokens * json_llm.CHARS_PER_TOKEN]
+        pages = PAGE_TAG.findall(visible)
+        quantidade = int(QUANTIDADE.search(prompt).group(1))
+        # Spread the questions over the pages the model could read.
+        chosen = [
+            pages[i * len(pages) // quantidade]
+            for i in range(min(quantidade, len(pages)))
+        ]
+        tokens = len(visible) / json_llm.CHARS_PER_TOKEN
+        time.sleep(
+            (tokens / 1000 * ms_per_1k_tokens + len(chosen) * ms_per_question) / 1000
+        )
+        return json.dumps(
+            [
+                {
+                    "texto": f"Sobre a pagina{page}, qual afirmação é correta?",
+                    "alternativas": [
+                        {"texto": f"Opção {i}", "correta": i == 0} for i in range(4)
+                    ],
+                }
+                for page in chosen
+            ]
+        )
+
+    return predict
+
+
+def coverage(perguntas, pages: int) -> str:
+    cited = [
+        int(PAGE_TAG.search(q["texto"]).group(1))
+        for q in perguntas
+        if PAGE_TAG.search(q["texto"])
+    ]
+    if not cited:
+        return "no questions"
+    tenths = {page * 10 // pages for page in cited}
+    return (
+        f"{len(perguntas)} questions, {len(tenths)}/10 of the document, "
+        f"pages {min(cited)}-{max(cited)}"
+    )
+
+
+async def single_prompt(text: str):
+    return padronizar_json(await json_llm.bott(text))
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.question_generation")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--context-tokens", type=int, default=8192)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40)
+    parser.add_argument("--ms-per-question", type=float, default=400)
+    args = parser.parse_args()
+
+    json_llm.llm_cache = NullCache()
+    json_llm.predict = simulated_model(
+        args.context_tokens, args.ms_per_1k_tokens, args.ms_per_question
+    )
+    filler = " ".join(["conteúdo"] * (args.words_per_page - 1))
+    text = "\n".join(f"pagina{page} {filler}" for page in range(args.pages))
+
+    for name, generate in (
+        ("single prompt", single_prompt),
+        ("chunked", json_llm.generate_perguntas),
+    ):
+        start = time.perf_counter()
+        perguntas = await generate(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed:.2f}s, {coverage(perguntas, args.pages)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
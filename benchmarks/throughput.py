@@ -0,0 +1,43 @@
+"""Read throughput of a running server under concurrent load.
+
+Seeds a throwaway user and quiz tree through the API, then cycles every
+concurrent client over the authenticated read endpoints (theme list and
+tree, phases, questions, /users/me/) for a fixed time:
+
+    python -m benchmarks.throughput --url http://localhost:8000 \\
+        --concurrency 64 --seconds 20
+
+Only endpoints that predate the async database layer are used, so the same
+run can be pointed at an older deployment to compare the two.
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import create_user, hammer, new_client, seed_quiz, summarize
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.throughput")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--temas", type=int, default=5)
+    parser.add_argument("--fases", type=int, default=3)
+    parser.add_argument("--perguntas", type=int, default=5)
+    args = parser.parse_args()
+
+    async with new_client(args.url, args.concurrency) as client:
+        _, headers = await create_user(client)
+        urls = await seed_quiz(client, headers, args.temas, args.fases, args.perguntas)
+        requests = [("GET", url, {"headers": headers}) for url in urls]
+        # Warm up connections and caches before measuring.
+        await hammer(client, requests, args.concurrency, 2)
+        latencies, errors, elapsed = await hammer(
+            client, requests, args.concurrency, args.seconds
+        )
+    print(summarize(f"reads x{args.concurrency}", latencies, errors, elapsed))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,196 +1,408 @@
+import random
+import uuid
 from datetime import datetime, timezone
-from typing import List
-
-from models.models import Alternativa, Fase, Pergunta, Tema, User, UserProgress
+from typing import List, Optional
+
+from models.models import (
+    Alternativa,
+    Fase,
+    Job,
+    Pergunta,
+    ProgressSummary,
+    Tema,
+    User,
+    UserProgress,
+    UserProgressHistory,
+)
+from pydantic import TypeAdapter, ValidationError
 from schemas.schemas import (
     FaseCreate,
     PerguntaCreate,
     PerguntaSimpleCreate,
+    PlaySession,
+    Resposta,
+    RespostaResult,
     TemaCreate,
     UserCreate,
     UserProgressCreate,
 )
-from sqlalchemy.orm import Session
+from services.answer_key import answer_keys
+from services.progress_history import PROGRESS_HISTORY_ENABLED
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
+
+# Loader options for each response shape, so a full tree is fetched with one
+# SELECT per level instead of one lazy load per row during serialization.
+PERGUNTA_LOAD = (selectinload(Pergunta.alternativas),)
+FASE_LOAD = (selectinload(Fase.perguntas).selectinload(Pergunta.alternativas),)
+TEMA_LOAD = (
+    selectinload(Tema.fases)
+    .selectinload(Fase.perguntas)
+    .selectinload(Pergunta.alternativas),
+)
+
+# Loader options by response depth, matching schemas.TEMA_DEPTHS/FASE_DEPTHS.
+TEMA_DEPTH_LOADS = (
+    (),
+    (selectinload(Tema.fases),),
+    (selectinload(Tema.fases).selectinload(Fase.perguntas),),
+    TEMA_LOAD,
+)
+FASE_DEPTH_LOADS = ((), (selectinload(Fase.perguntas),), FASE_LOAD)
+
+PERGUNTAS_BATCH = TypeAdapter(List[PerguntaSimpleCreate])
+
+
+def tema_owned(tema_id: int, user_id: int):
+    """EXISTS clause that is true when the theme belongs to the user."""
+    return select(Tema.id).filter(Tema.id == tema_id, Tema.owner_id == user_id).exists()
+
+
+def fase_owned(fase_id: int, user_id: int, tema_id: Optional[int] = None):
+    """EXISTS clause that is true when the phase belongs to the user.
+
+    With ``tema_id``, the phase must also belong to that theme.
+    """
+    query = (
+        select(Fase.id).join(Tema).filter(Fase.id == fase_id, Tema.owner_id == user_id)
+    )
+    if tema_id is not None:
+        query = query.filter(Fase.tema_id == tema_id)
+    return query.exists()
+
+
+def upsert(db: AsyncSession, model, values: dict, updates, keys=None):
+    """INSERT that updates the existing row on a primary/unique key clash.
+
+    ``updates`` receives the proposed row (MySQL's VALUES(), SQLite's
+    excluded) and returns the assignments; plain ``model`` columns refer to
+    the stored row. ``keys`` names the unique columns, the primary key by
+    default.
+    """
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(model).values(**values)
+        return stmt.on_duplicate_key_update(**updates(stmt.inserted))
+    stmt = sqlite_insert(model).values(**values)
+    return stmt.on_conflict_do_update(
+        index_elements=keys or [c.name for c in model.__table__.primary_key],
+        set_=updates(stmt.excluded),
+    )
+
+
+def tema_of_fase(fase_id: int):
+    """Scalar subquery for the theme id of a phase."""
+    return select(Fase.tema_id).filter(Fase.id == fase_id).scalar_subquery()
+
+
+async def bump_temas_version(db: AsyncSession, user_id: int):
+    """Advance the user's theme version counter; see User.temas_version."""
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(temas_version=User.temas_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def temas_version(user_id: int):
+    """Scalar subquery for the user's current theme version counter."""
+    return select(User.temas_version).filter(User.id == user_id).scalar_subquery()
+
+
+async def bump_tema_version(db: AsyncSession, tema_id, user_id: int):
+    """Invalidate cached reads of a theme's tree by bumping its version.
+
+    The new version comes from the owner's counter, so a version is never
+    handed out twice, even to a theme that reuses a deleted theme's id.
+    """
+    await bump_temas_version(db, user_id)
+    await db.execute(
+        update(Tema)
+        .where(Tema.id == tema_id)
+        .values(version=temas_version(user_id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def after_id(query, column, cursor_id: Optional[int]):
+    """Order a page by primary key and start it after cursor_id, if given.
+
+    Seeking on the key keeps deep pages as cheap as the first one, unlike
+    an OFFSET that scans and discards every skipped row.
+    """
+    if cursor_id is not None:
+        query = query.filter(column > cursor_id)
+    return query.order_by(column)
 
 
-def get_user(db: Session, user_id: int):
+async def get_user(db: AsyncSession, user_id: int):
     """Retrieve a user by their ID."""
-    return db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).filter(User.id == user_id))
+    return result.scalars().first()
 
 
-def get_user_by_username(db: Session, username: str):
+async def get_user_by_username(db: AsyncSession, username: str):
     """Retrieve a user by their username."""
-    return db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).filter(User.username == username))
+    return result.scalars().first()
 
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: AsyncSession, email: str):
     """Retrieve a user by their email."""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
 
-def create_user(db: Session, user: UserCreate, hashed_password: str):
+async def create_user(db: AsyncSession, user: UserCreate, hashed_password: str):
     """Create a new user with a hashed password."""
     db_user = User(username=user.username, email=user.email, password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def get_temas_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+async def get_temas_version(db: AsyncSession, user_id: int):
+    """Version of all the user's themes; changes whenever any of them does."""
+    return await db.scalar(select(User.temas_version).filter(User.id == user_id))
+
+
+async def get_tema_version(db: AsyncSession, tema_id: int, user_id: int):
+    """Current version of a theme owned by the user, or None."""
+    return await db.scalar(
+        select(Tema.version).filter(Tema.id == tema_id, Tema.owner_id == user_id)
+    )
+
+
+async def get_fase_version(db: AsyncSession, fase_id: int, user_id: int):
+    """Version of the theme a phase owned by the user belongs to, or None."""
+    return await db.scalar(
+        select(Tema.version)
+        .join(Fase, Fase.tema_id == Tema.id)
+        .filter(Fase.id == fase_id, Tema.owner_id == user_id)
+    )
+
+
+async def get_pergunta_version(db: AsyncSession, pergunta_id: int, user_id: int):
+    """Version of the theme a question owned by the user belongs to, or None."""
+    return await db.scalar(
+        select(Tema.version)
+        .join(Fase, Fase.tema_id == Tema.id)
+        .join(Pergunta, Pergunta.fase_id == Fase.id)
+        .filter(Pergunta.id == pergunta_id, Tema.owner_id == user_id)
+    )
+
+
+async def get_temas_by_user(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor_id: Optional[int] = None,
+    depth: int = len(TEMA_DEPTH_LOADS) - 1,
+):
     """Retrieve themes by user ID with optional pagination."""
-    return (
-        db.query(Tema).filter(Tema.owner_id == user_id).offset(skip).limit(limit).all()
+    query = (
+        select(Tema).options(*TEMA_DEPTH_LOADS[depth]).filter(Tema.owner_id == user_id)
     )
+    result = await db.execute(
+        after_id(query, Tema.id, cursor_id).offset(skip).limit(limit)
+    )
+    return result.scalars().all()
 
 
-def get_tema(db: Session, tema_id: int, user_id: int):
+async def get_tema(
+    db: AsyncSession,
+    tema_id: int,
+    user_id: int,
+    depth: int = len(TEMA_DEPTH_LOADS) - 1,
+):
     """Retrieve a theme by its ID and user ID."""
-    return db.query(Tema).filter(Tema.id == tema_id, Tema.owner_id == user_id).first()
+    result = await db.execute(
+        select(Tema)
+        .options(*TEMA_DEPTH_LOADS[depth])
+        .filter(Tema.id == tema_id, Tema.owner_id == user_id)
+    )
+    return result.scalars().first()
 
 
-def create_tema(db: Session, tema: TemaCreate, user_id: int):
+async def create_tema(db: AsyncSession, tema: TemaCreate, user_id: int):
     """Create a new theme for a user."""
-    db_tema = Tema(nome=tema.nome, descricao=tema.descricao, owner_id=user_id)
+    await bump_temas_version(db, user_id)
+    db_tema = Tema(
+        nome=tema.nome,
+        descricao=tema.descricao,
+        owner_id=user_id,
+        version=temas_version(user_id),
+    )
     db.add(db_tema)
-    db.commit()
-    db.refresh(db_tema)
+    await db.commit()
+    await db.refresh(db_tema, ["version", "fases"])
     return db_tema
 
 
-def update_tema(db: Session, tema_id: int, tema: TemaCreate, user_id: int):
+async def update_tema(db: AsyncSession, tema_id: int, tema: TemaCreate, user_id: int):
     """Update an existing theme."""
-    db_tema = get_tema(db, tema_id, user_id)
+    db_tema = await get_tema(db, tema_id, user_id)
     if not db_tema:
         return None
     db_tema.nome = tema.nome
     db_tema.descricao = tema.descricao
-    db.commit()
-    db.refresh(db_tema)
+    await bump_tema_version(db, tema_id, user_id)
+    await db.commit()
     return db_tema
 
 
-def delete_tema(db: Session, tema_id: int, user_id: int):
+async def delete_tema(db: AsyncSession, tema_id: int, user_id: int):
     """Delete a theme by its ID and user ID."""
-    db_tema = get_tema(db, tema_id, user_id)
+    db_tema = await get_tema(db, tema_id, user_id)
     if db_tema:
-        db.delete(db_tema)
-        db.commit()
+        await bump_temas_version(db, user_id)
+        await db.delete(db_tema)
+        await db.commit()
         return True
     return False
 
 
-def get_fases_by_tema(
-    db: Session, tema_id: int, user_id: int, skip: int = 0, limit: int = 100
+async def get_fases_by_tema(
+    db: AsyncSession,
+    tema_id: int,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor_id: Optional[int] = None,
+    depth: int = len(FASE_DEPTH_LOADS) - 1,
 ):
     """Retrieve phases by theme ID and user ID with optional pagination."""
-    tema = get_tema(db, tema_id, user_id)
-    if not tema:
-        return []
-    return (
-        db.query(Fase).filter(Fase.tema_id == tema_id).offset(skip).limit(limit).all()
+    query = (
+        select(Fase)
+        .join(Tema)
+        .options(*FASE_DEPTH_LOADS[depth])
+        .filter(Fase.tema_id == tema_id, Tema.owner_id == user_id)
+    )
+    result = await db.execute(
+        after_id(query, Fase.id, cursor_id).offset(skip).limit(limit)
     )
+    return result.scalars().all()
 
 
-def get_fase(db: Session, fase_id: int, user_id: int):
+async def get_fase(
+    db: AsyncSession,
+    fase_id: int,
+    user_id: int,
+    depth: int = len(FASE_DEPTH_LOADS) - 1,
+):
     """Retrieve a phase by its ID and user ID."""
-    return (
-        db.query(Fase)
+    result = await db.execute(
+        select(Fase)
         .join(Tema)
+        .options(*FASE_DEPTH_LOADS[depth])
         .filter(Fase.id == fase_id, Tema.owner_id == user_id)
-        .first()
     )
+    return result.scalars().first()
 
 
-def create_fase(db: Session, fase: FaseCreate, tema_id: int, user_id: int):
+async def create_fase(db: AsyncSession, fase: FaseCreate, tema_id: int, user_id: int):
     """Create a new phase for a theme."""
-    tema = get_tema(db, tema_id, user_id)
-    if not tema:
+    if not await db.scalar(select(tema_owned(tema_id, user_id))):
         return None
     db_fase = Fase(nome=fase.nome, descricao=fase.descricao, tema_id=tema_id)
     db.add(db_fase)
-    db.commit()
-    db.refresh(db_fase)
+    await bump_tema_version(db, tema_id, user_id)
+    await db.commit()
+    await db.refresh(db_fase, ["perguntas"])
     return db_fase
 
 
-def update_fase(db: Session, fase_id: int, fase: FaseCreate, user_id: int):
+async def update_fase(db: AsyncSession, fase_id: int, fase: FaseCreate, user_id: int):
     """Update an existing phase."""
-    db_fase = get_fase(db, fase_id, user_id)
+    db_fase = await get_fase(db, fase_id, user_id)
     if not db_fase:
         return None
     db_fase.nome = fase.nome
     db_fase.descricao = fase.descricao
-    db.commit()
-    db.refresh(db_fase)
+    await bump_tema_version(db, db_fase.tema_id, user_id)
+    await db.commit()
     return db_fase
 
 
-def delete_fase(db: Session, fase_id: int, user_id: int):
+async def delete_fase(db: AsyncSession, fase_id: int, user_id: int):
     """Delete a phase by its ID and user ID."""
-    db_fase = get_fase(db, fase_id, user_id)
+    db_fase = await get_fase(db, fase_id, user_id)
     if db_fase:
-        db.delete(db_fase)
-        db.commit()
+        await bump_tema_version(db, db_fase.tema_id, user_id)
+        await db.delete(db_fase)
+        await db.commit()
         return True
     return False
 
 
-def get_perguntas_by_fase(
-    db: Session, fase_id: int, user_id: int, skip: int = 0, limit: int = 100
+async def get_perguntas_by_fase(
+    db: AsyncSession,
+    fase_id: int,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor_id: Optional[int] = None,
 ):
     """Retrieve questions by phase ID and user ID with optional pagination."""
-    fase = get_fase(db, fase_id, user_id)
-    if not fase:
-        return []
-    return (
-        db.query(Pergunta)
-        .filter(Pergunta.fase_id == fase_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = (
+        select(Pergunta)
+        .join(Fase)
+        .join(Tema)
+        .options(*PERGUNTA_LOAD)
+        .filter(Pergunta.fase_id == fase_id, Tema.owner_id == user_id)
+    )
+    result = await db.execute(
+        after_id(query, Pergunta.id, cursor_id).offset(skip).limit(limit)
     )
+    return result.scalars().all()
 
 
-def get_pergunta(db: Session, pergunta_id: int, user_id: int):
+async def get_pergunta(db: AsyncSession, pergunta_id: int, user_id: int):
     """Retrieve a question by its ID and user ID."""
-    return (
-        db.query(Pergunta)
+    result = await db.execute(
+        select(Pergunta)
         .join(Fase)
         .join(Tema)
+        .options(*PERGUNTA_LOAD)
         .filter(Pergunta.id == pergunta_id, Tema.owner_id == user_id)
-        .first()
     )
+    return result.scalars().first()
 
 
-def create_pergunta(db: Session, pergunta: PerguntaCreate, fase_id: int, user_id: int):
+async def create_pergunta(
+    db: AsyncSession, pergunta: PerguntaCreate, fase_id: int, user_id: int
+):
     """Create a new question for a phase."""
-    fase = get_fase(db, fase_id, user_id)
-    if not fase:
+    if not await db.scalar(select(fase_owned(fase_id, user_id))):
         return None
     if len(pergunta.alternativas) != 4:
         return None
     if sum(1 for alt in pergunta.alternativas if alt.correta) != 1:
         return None
-    db_pergunta = Pergunta(texto=pergunta.texto, fase_id=fase_id)
+    db_pergunta = Pergunta(
+        texto=pergunta.texto,
+        fase_id=fase_id,
+        alternativas=[
+            Alternativa(texto=alt.texto, correta=alt.correta)
+            for alt in pergunta.alternativas
+        ],
+    )
     db.add(db_pergunta)
-    db.commit()
-    db.refresh(db_pergunta)
-    for alt in pergunta.alternativas:
-        db_alternativa = Alternativa(
-            texto=alt.texto, correta=alt.correta, pergunta_id=db_pergunta.id
-        )
-        db.add(db_alternativa)
-    db.commit()
-    db.refresh(db_pergunta)
+    await bump_tema_version(db, tema_of_fase(fase_id), user_id)
+    await db.commit()
     return db_pergunta
 
 
-def update_pergunta(
-    db: Session, pergunta_id: int, pergunta: PerguntaCreate, user_id: int
+async def update_pergunta(
+    db: AsyncSession, pergunta_id: int, pergunta: PerguntaCreate, user_id: int
 ):
     """Update an existing question."""
-    db_pergunta = get_pergunta(db, pergunta_id, user_id)
+    db_pergunta = await get_pergunta(db, pergunta_id, user_id)
     if not db_pergunta:
         return None
     if len(pergunta.alternativas) != 4:
@@ -198,98 +410,327 @@ def update_pergunta(
     if sum(1 for alt in pergunta.alternativas if alt.correta) != 1:
         return None
     db_pergunta.texto = pergunta.texto
-    db.query(Alternativa).filter(Alternativa.pergunta_id == pergunta_id).delete()
-    for alt in pergunta.alternativas:
-        db_alternativa = Alternativa(
-            texto=alt.texto, correta=alt.correta, pergunta_id=db_pergunta.id
-        )
-        db.add(db_alternativa)
-    db.commit()
-    db.refresh(db_pergunta)
+    # delete-orphan on Pergunta.alternativas removes the old rows on flush.
+    db_pergunta.alternativas = [
+        Alternativa(texto=alt.texto, correta=alt.correta)
+        for alt in pergunta.alternativas
+    ]
+    await bump_tema_version(db, tema_of_fase(db_pergunta.fase_id), user_id)
+    await db.commit()
     return db_pergunta
 
 
-def delete_pergunta(db: Session, pergunta_id: int, user_id: int):
+async def delete_pergunta(db: AsyncSession, pergunta_id: int, user_id: int):
     """Delete a question by its ID and user ID."""
-    db_pergunta = get_pergunta(db, pergunta_id, user_id)
+    db_pergunta = await get_pergunta(db, pergunta_id, user_id)
     if db_pergunta:
-        db.delete(db_pergunta)
-        db.commit()
+        await bump_tema_version(db, tema_of_fase(db_pergunta.fase_id), user_id)
+        await db.delete(db_pergunta)
+        await db.commit()
         return True
     return False
 
 
-def check_resposta(db: Session, pergunta_id: int, alternativa_id: int, user_id: int):
-    """Check if an answer is correct."""
-    pergunta = get_pergunta(db, pergunta_id, user_id)
-    if not pergunta:
-        return {"correta": False, "resposta_correta": None}
-    alternativa = (
-        db.query(Alternativa)
-        .filter(
-            Alternativa.pergunta_id == pergunta_id, Alternativa.id == alternativa_id
+async def load_answer_key(db: AsyncSession, pergunta_id: int):
+    """Load a question's answer key into the index with a single query."""
+    result = await db.execute(
+        select(
+            Alternativa.id,
+            Alternativa.correta,
+            Tema.owner_id,
+            Tema.id.label("tema_id"),
+            Tema.version,
         )
-        .first()
+        .join(Pergunta, Alternativa.pergunta_id == Pergunta.id)
+        .join(Fase, Pergunta.fase_id == Fase.id)
+        .join(Tema, Fase.tema_id == Tema.id)
+        .filter(Alternativa.pergunta_id == pergunta_id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    correct_id = next((row.id for row in rows if row.correta), None)
+    return answer_keys.set(
+        pergunta_id,
+        correct_id,
+        [row.id for row in rows],
+        rows[0].owner_id,
+        rows[0].tema_id,
+        rows[0].version,
     )
-    if not alternativa:
+
+
+async def check_resposta(
+    db: AsyncSession, pergunta_id: int, alternativa_id: int, user_id: int
+):
+    """Check if an answer is correct."""
+    answer_key = answer_keys.get(pergunta_id)
+    # Another worker may have changed the question; any write bumps the
+    # tema version, so a stale entry is caught with one primary-key lookup.
+    if answer_key is not None and answer_key.version != await get_tema_version(
+        db, answer_key.tema_id, user_id
+    ):
+        answer_key = None
+    if answer_key is None:
+        answer_key = await load_answer_key(db, pergunta_id)
+    if answer_key is None:
         return {"correta": False, "resposta_correta": None}
-    if alternativa.correta:
+    correct_id, valid_ids, owner_id, _, _ = answer_key
+    if owner_id != user_id or alternativa_id not in valid_ids:
+        return {"correta": False, "resposta_correta": None}
+    if alternativa_id == correct_id:
         return {"correta": True}
-    alternativa_correta = (
-        db.query(Alternativa)
-        .filter(Alternativa.pergunta_id == pergunta_id, Alternativa.correta.is_(True))
-        .first()
+    return {"correta": False, "resposta_correta": correct_id}
+
+
+async def get_play_session(db: AsyncSession, fase_id: int, user_id: int):
+    """Return a phase's questions with shuffled alternatives and no answers."""
+    db_fase = await get_fase(db, fase_id, user_id)
+    if db_fase is None:
+        return None
+    session = PlaySession.model_validate(db_fase)
+    for pergunta in session.perguntas:
+        random.shuffle(pergunta.alternativas)
+    return session
+
+
+async def submit_play(
+    db: AsyncSession, fase_id: int, respostas: List[Resposta], user_id: int
+):
+    """Grade every answer for a phase and record the attempt in one transaction."""
+    # One row per question with its correct alternative; a single row of
+    # NULLs still proves ownership of a phase without questions.
+    result = await db.execute(
+        select(
+            Fase.tema_id,
+            Pergunta.id,
+            Alternativa.id,
+        )
+        .select_from(Fase)
+        .join(Tema, Fase.tema_id == Tema.id)
+        .outerjoin(Pergunta, Pergunta.fase_id == Fase.id)
+        .outerjoin(
+            Alternativa,
+            (Alternativa.pergunta_id == Pergunta.id) & Alternativa.correta.is_(True),
+        )
+        .filter(Fase.id == fase_id, Tema.owner_id == user_id)
     )
+    rows = result.all()
+    if not rows:
+        return None
+    tema_id = rows[0][0]
+    gabarito = {pergunta_id: correct_id for _, pergunta_id, correct_id in rows}
+    gabarito.pop(None, None)
+
+    answers = {}
+    for resposta in respostas:
+        if resposta.pergunta_id in gabarito:
+            answers.setdefault(resposta.pergunta_id, resposta.alternativa_id)
+    resultados = [
+        RespostaResult(
+            pergunta_id=pergunta_id,
+            alternativa_id=alternativa_id,
+            correta=alternativa_id == gabarito[pergunta_id],
+            resposta_correta=gabarito[pergunta_id],
+        )
+        for pergunta_id, alternativa_id in answers.items()
+    ]
+    score = sum(r.correta for r in resultados)
+    completed = bool(gabarito) and len(answers) == len(gabarito)
+
+    db_progress = await record_attempt(db, user_id, tema_id, fase_id, completed, score)
+    await db.commit()
     return {
-        "correta": False,
-        "resposta_correta": alternativa_correta.id if alternativa_correta else None,
+        "score": score,
+        "total": len(gabarito),
+        "completed": completed,
+        "resultados": resultados,
+        "progress": db_progress,
     }
 
 
-def get_progress_by_user(db: Session, user_id: int):
+async def get_progress_by_user(db: AsyncSession, user_id: int):
     """Retrieve user progress by user ID."""
-    return db.query(UserProgress).filter(UserProgress.user_id == user_id).all()
+    result = await db.execute(
+        select(UserProgress).filter(UserProgress.user_id == user_id)
+    )
+    return result.scalars().all()
+
+
+async def record_attempt(
+    db: AsyncSession,
+    user_id: int,
+    tema_id: int,
+    fase_id: int,
+    completed: bool,
+    score: int,
+):
+    """Record an attempt and return the user's best progress row for the phase.
+
+    The user_progress row keeps the best score and the first completion
+    date, the attempt itself goes to the history table when enabled, and the
+    theme summary is updated. Not committed.
+    """
+    now = datetime.now(timezone.utc)
+    # Make sure the row exists, then read it under a row lock: whether this
+    # attempt is the phase's first completion must come from the locked row,
+    # or two concurrent completions would both count in completed_fases.
+    await db.execute(
+        upsert(
+            db,
+            UserProgress,
+            {
+                "user_id": user_id,
+                "tema_id": tema_id,
+                "fase_id": fase_id,
+                "completed": False,
+                "score": score,
+                "date_completed": None,
+            },
+            lambda new: {"completed": UserProgress.completed},
+            keys=["user_id", "fase_id"],
+        )
+    )
+    result = await db.execute(
+        select(UserProgress)
+        .filter(UserProgress.user_id == user_id, UserProgress.fase_id == fase_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    db_progress = result.scalars().one()
+    first_completion = completed and not db_progress.completed
+    db_progress.score = max(db_progress.score, score)
+    if first_completion:
+        db_progress.completed = True
+        db_progress.date_completed = now
+
+    if PROGRESS_HISTORY_ENABLED:
+        db.add(
+            UserProgressHistory(
+                user_id=user_id,
+                tema_id=tema_id,
+                fase_id=fase_id,
+                score=score,
+                completed=completed,
+                created_at=now,
+            )
+        )
+    await db.execute(
+        upsert(
+            db,
+            ProgressSummary,
+            {
+                "user_id": user_id,
+                "tema_id": tema_id,
+                "attempts": 1,
+                "best_score": score,
+                "completed_fases": int(first_completion),
+                "last_completed_at": now if completed else None,
+            },
+            lambda new: {
+                "attempts": ProgressSummary.attempts + 1,
+                "best_score": case(
+                    (new.best_score > ProgressSummary.best_score, new.best_score),
+                    else_=ProgressSummary.best_score,
+                ),
+                "completed_fases": ProgressSummary.completed_fases
+                + new.completed_fases,
+                "last_completed_at": func.coalesce(
+                    new.last_completed_at, ProgressSummary.last_completed_at
+                ),
+            },
+        )
+    )
+    return db_progress
 
 
-def create_progress(db: Session, progress: UserProgressCreate, user_id: int):
-    """Create a new progress record for a user."""
-    tema = get_tema(db, progress.tema_id, user_id)
-    fase = get_fase(db, progress.fase_id, user_id)
-    if not tema or not fase:
+async def create_progress(db: AsyncSession, progress: UserProgressCreate, user_id: int):
+    """Record an attempt, keeping the best progress per user and phase."""
+    # The phase must sit in the posted theme, or its completion would be
+    # counted in another theme's summary.
+    fase_ok = await db.scalar(
+        select(fase_owned(progress.fase_id, user_id, tema_id=progress.tema_id))
+    )
+    if not fase_ok:
         return None
-    db_progress = UserProgress(
-        user_id=user_id,
-        tema_id=progress.tema_id,
-        fase_id=progress.fase_id,
-        completed=progress.completed,
-        score=progress.score,
-        date_completed=datetime.now(timezone.utc) if progress.completed else None,
+    db_progress = await record_attempt(
+        db,
+        user_id,
+        progress.tema_id,
+        progress.fase_id,
+        progress.completed,
+        progress.score,
     )
-    db.add(db_progress)
-    db.commit()
-    db.refresh(db_progress)
+    await db.commit()
     return db_progress
 
 
-def create_multiple_perguntas(
-    db: Session, perguntas_list: List[dict], fase_id: int, user_id: int
+async def get_progress_summary(db: AsyncSession, user_id: int):
+    """Retrieve the user's per-theme progress summary."""
+    result = await db.execute(
+        select(ProgressSummary)
+        .filter(ProgressSummary.user_id == user_id)
+        .order_by(ProgressSummary.tema_id)
+    )
+    return result.scalars().all()
+
+
+async def create_multiple_perguntas(
+    db: AsyncSession, perguntas_list: List[dict], fase_id: int, user_id: int
 ):
-    """Create multiple questions associated with a phase."""
-    perguntas_objs = []
-    for pergunta_data in perguntas_list:
-        pergunta_schema = PerguntaSimpleCreate(**pergunta_data)
-        db_pergunta = Pergunta(texto=pergunta_schema.texto, fase_id=fase_id)
-        db.add(db_pergunta)
-        db.commit()
-        db.refresh(db_pergunta)
-        for alternativa_data in pergunta_schema.alternativas:
-            db_alternativa = Alternativa(
-                texto=alternativa_data.texto,
-                correta=alternativa_data.correta,
-                pergunta_id=db_pergunta.id,
-            )
-            db.add(db_alternativa)
-        db.commit()
-        db.refresh(db_pergunta)
-        perguntas_objs.append(db_pergunta)
-    return perguntas_objs
+    """Add multiple questions to a phase without committing.
+
+    The caller commits, so it can record the outcome in the same transaction.
+    """
+    try:
+        perguntas = PERGUNTAS_BATCH.validate_python(perguntas_list)
+    except ValidationError:
+        return None
+    if not await db.scalar(select(fase_owned(fase_id, user_id))):
+        return None
+    if not perguntas:
+        return []
+
+    db_perguntas = [Pergunta(texto=p.texto, fase_id=fase_id) for p in perguntas]
+    db.add_all(db_perguntas)
+    # Flush the questions once to get their ids, then insert every
+    # alternative with a single executemany.
+    await db.flush()
+    await db.execute(
+        insert(Alternativa),
+        [
+            {"texto": alt.texto, "correta": alt.correta, "pergunta_id": db_p.id}
+            for db_p, pergunta in zip(db_perguntas, perguntas)
+            for alt in pergunta.alternativas
+        ],
+    )
+    await bump_tema_version(db, tema_of_fase(fase_id), user_id)
+    return db_perguntas
+
+
+async def create_job(db: AsyncSession, payload: bytes, fase_id: int, user_id: int):
+    """Queue a question-generation job for a phase owned by the user."""
+    if not await db.scalar(select(fase_owned(fase_id, user_id))):
+        return None
+    db_job = Job(
+        id=uuid.uuid4().hex,
+        owner_id=user_id,
+        fase_id=fase_id,
+        status="queued",
+        attempts=0,
+        payload=bytes(payload),
+        pergunta_ids=[],
+    )
+    db.add(db_job)
+    await db.commit()
+    return db_job
+
+
+async def get_job(db: AsyncSession, job_id: str, user_id: int):
+    """Retrieve a job by its ID and user ID."""
+    result = await db.execute(
+        select(Job)
+        .options(defer(Job.payload))
+        .filter(Job.id == job_id, Job.owner_id == user_id)
+    )
+    return result.scalars().first()
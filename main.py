@@ -1,32 +1,86 @@
+import logging
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import (
     FastAPI,
     Request,
 )
 from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from auth.auth import password_hasher
+from middleware.compression import add_compression_middleware
 from middleware.cors import add_cors_middleware
-from routes import auth, fases, perguntas, progress, temas, users
-from settings.database import Base, engine
+from middleware.metrics import add_metrics_middleware
+from migrations.runner import pending_migrations
+from routes import (
+    auth,
+    fases,
+    health,
+    jobs,
+    perguntas,
+    play,
+    progress,
+    temas,
+    users,
+)
+from services.assets import FingerprintedStaticFiles, PrerenderedPage
+from services.jobs import job_queue
+from services.metrics import metrics_flusher
+from services.progress_history import history_compactor
+from services.views import FastJSONResponse
+from settings.database import THREADPOOL_SIZE, engine
+
+logger = logging.getLogger(__name__)
 
-Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    # The schema is managed by `python -m migrations upgrade` at deploy time.
+    pending = await pending_migrations()
+    if pending:
+        logger.warning(
+            "Database schema is %d migration(s) behind; run `python -m migrations`",
+            len(pending),
+        )
+    job_queue.start()
+    history_compactor.start()
+    metrics_flusher.start()
+    yield
+    await metrics_flusher.stop()
+    await history_compactor.stop()
+    await job_queue.stop()
+    password_hasher.shutdown()
+    await engine.dispose()
 
-app = FastAPI(title="Quiz Game API")
+
+app = FastAPI(
+    title="Quiz Game API",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 
 
 add_cors_middleware(app)
+add_compression_middleware(app)
+# Outermost, so latency covers compression and every other middleware.
+add_metrics_middleware(app)
 
 templates = Jinja2Templates(directory="templates")
 
 
-app.mount("/static", StaticFiles(directory="templates/static/assets"), name="static")
+static_files = FingerprintedStaticFiles()
+app.mount("/static", static_files, name="static")
+
+# index.html has no per-request context, so it is rendered once at startup.
+index_page = PrerenderedPage(templates, "index.html", static_url=static_files.url)
 
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return index_page.response(request)
 
 
 app.include_router(auth.router, prefix="", tags=["auth"])
@@ -34,4 +88,7 @@ app.include_router(users.router, prefix="", tags=["users"])
 app.include_router(temas.router, prefix="", tags=["temas"])
 app.include_router(fases.router, prefix="", tags=["fases"])
 app.include_router(perguntas.router, prefix="", tags=["perguntas"])
+app.include_router(play.router, prefix="", tags=["play"])
 app.include_router(progress.router, prefix="", tags=["progress"])
+app.include_router(jobs.router, prefix="", tags=["jobs"])
+app.include_router(health.router, prefix="", tags=["health"])
@@ -0,0 +1,165 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available.
+    brotli = None
+
+CONTENT_ENCODINGS = ("br", "gzip")
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: str):
+    """Pick br or gzip from an Accept-Encoding header, or None."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag for the encoded variant: strong ETags must differ per encoding."""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def strip_etag_suffix(value: str, encoding: str) -> str:
+    return value.replace(f'-{encoding}"', '"')
+
+
+def make_compressor(encoding: str):
+    """Return (compress, finish) callables for a streaming encoder."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    return compressor.compress, compressor.flush
+
+
+class CompressionMiddleware:
+    """gzip/brotli response compression for text-like content.
+
+    Bodies below ``minimum_size``, other content types and responses that
+    are already encoded pass through untouched. Streamed bodies are
+    compressed chunk by chunk as they are sent rather than buffered. Each
+    encoding gets its own ETag, and If-None-Match values carrying one are
+    mapped back before they reach the routes.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = choose_encoding(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = request_headers.get("if-none-match", "")
+        if if_none_match:
+            scope["headers"] = [
+                (
+                    key,
+                    strip_etag_suffix(value.decode("latin-1"), encoding).encode(
+                        "latin-1"
+                    ),
+                )
+                if key == b"if-none-match"
+                else (key, value)
+                for key, value in scope["headers"]
+            ]
+
+        start = None
+        compress = finish = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compress, finish, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] == 304 and f'-{encoding}"' in if_none_match:
+                    headers = MutableHeaders(scope=start)
+                    if "etag" in headers:
+                        headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compress is None:
+                headers = MutableHeaders(scope=start)
+                if (
+                    "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(
+                        COMPRESSIBLE_TYPES
+                    )
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compress, finish = make_compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if not more_body:
+                    body = compress(body) + finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                del headers["Content-Length"]
+                await send(start)
+
+            chunk = compress(body)
+            if not more_body:
+                chunk += finish()
+            if chunk or not more_body:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": more_body,
+                    }
+                )
+
+        await self.app(scope, receive, send_compressed)
+
+
+def add_compression_middleware(app):
+    app.add_middleware(CompressionMiddleware)
@@ -1,4 +1,5 @@
 from fastapi.middleware.cors import CORSMiddleware
+from services.pagination import NEXT_CURSOR_HEADER
 
 
 def add_cors_middleware(app):
@@ -8,4 +9,5 @@ def add_cors_middleware(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
     )
@@ -0,0 +1,53 @@
+import time
+
+from services.metrics import metrics
+from services.query_budget import report_repeated_queries
+from settings.database import QueryStats, query_stats
+
+
+def route_label(scope) -> str:
+    """The matched route template, so path parameters don't split the series."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounts (e.g. /static) set root_path instead of a route.
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    """Records latency and SQL statement count/time for every HTTP request.
+
+    Also logs statements that repeat within one request, the usual sign of
+    a lazy relationship loaded in a loop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            query_stats.reset(token)
+            method, route = scope["method"], route_label(scope)
+            metrics.record(method, route, status, time.perf_counter() - start, stats)
+            report_repeated_queries(method, route, stats)
+
+
+def add_metrics_middleware(app):
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,30 @@
+import argparse
+import asyncio
+import logging
+
+from migrations.runner import applied_versions, load_migrations, upgrade
+from settings.database import engine
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m migrations")
+    parser.add_argument("command", choices=["upgrade", "status"], nargs="?")
+    parser.add_argument("--to", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            applied = await applied_versions()
+            for version, name, _ in load_migrations():
+                state = "applied" if version in applied else "pending"
+                print(f"{version:04d} {name}: {state}")
+        else:
+            applied = await upgrade(args.to)
+            print(f"Applied {len(applied)} migration(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
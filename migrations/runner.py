@@ -0,0 +1,104 @@
+import importlib
+import logging
+import pkgutil
+
+from migrations import versions
+from models.models import utcnow
+from settings.database import engine
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(100)),
+    Column("applied_at", DateTime, default=utcnow),
+)
+
+
+def load_migrations():
+    """Return (version, name, module) for each ``vNNNN_name`` module, in order."""
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = info.name.partition("_")
+        if not prefix.startswith("v") or not prefix[1:].isdigit():
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{info.name}")
+        found.append((int(prefix[1:]), name, module))
+    found.sort(key=lambda migration: migration[0])
+    return found
+
+
+def ensure_indexes(conn, *indexes):
+    """Create the given indexes unless an index of that name already exists."""
+    inspector = inspect(conn)
+    existing = {}
+    for index in indexes:
+        table_name = index.table.name
+        if table_name not in existing:
+            existing[table_name] = {
+                found["name"] for found in inspector.get_indexes(table_name)
+            }
+        if index.name not in existing[table_name]:
+            index.create(conn)
+
+
+def add_columns(conn, table, *columns):
+    """Add the given columns to ``table`` unless it already has them."""
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    for column in columns:
+        if column.name not in existing:
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+
+
+def _applied_versions(conn):
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _apply(conn, version: int, name: str, module):
+    module.upgrade(conn)
+    conn.execute(schema_migrations.insert().values(version=version, name=name))
+
+
+async def applied_versions():
+    """Read the applied versions without creating or altering anything."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(_applied_versions)
+
+
+async def pending_migrations():
+    applied = await applied_versions()
+    return [m for m in load_migrations() if m[0] not in applied]
+
+
+async def upgrade(target=None):
+    """Apply pending migrations up to ``target``, each in its own transaction."""
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all, checkfirst=True)
+    applied = []
+    for version, name, module in await pending_migrations():
+        if target is not None and version > target:
+            break
+        logger.info("Applying migration %04d %s", version, name)
+        async with engine.begin() as conn:
+            await conn.run_sync(_apply, version, name, module)
+        applied.append(version)
+    return applied
@@ -0,0 +1,108 @@
+"""Baseline schema, as create_all used to build it at startup.
+
+The tables are spelled out here rather than taken from models.models, so
+this migration keeps creating the same schema as the models change.
+"""
+
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+)
+
+metadata = MetaData()
+
+Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("username", String(50), unique=True, index=True),
+    Column("email", String(100), unique=True, index=True),
+    Column("password", String(100)),
+)
+
+Table(
+    "temas",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nome", String(100), index=True),
+    Column("descricao", Text, nullable=True),
+    Column("owner_id", Integer, ForeignKey("users.id")),
+)
+
+Table(
+    "fases",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("nome", String(100), index=True),
+    Column("descricao", Text, nullable=True),
+    Column("tema_id", Integer, ForeignKey("temas.id")),
+)
+
+Table(
+    "perguntas",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("texto", Text),
+    Column("fase_id", Integer, ForeignKey("fases.id")),
+)
+
+Table(
+    "alternativas",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("texto", Text),
+    Column("correta", Boolean),
+    Column("pergunta_id", Integer, ForeignKey("perguntas.id")),
+)
+
+Table(
+    "user_progress",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("tema_id", Integer, ForeignKey("temas.id")),
+    Column("fase_id", Integer, ForeignKey("fases.id")),
+    Column("completed", Boolean),
+    Column("score", Integer),
+    Column("date_completed", DateTime, nullable=True),
+)
+
+Table(
+    "jobs",
+    metadata,
+    Column("id", String(32), primary_key=True),
+    Column("owner_id", Integer, ForeignKey("users.id"), index=True),
+    Column("fase_id", Integer),
+    Column("status", String(20), index=True),
+    Column("attempts", Integer),
+    Column("error", Text, nullable=True),
+    Column("payload", LargeBinary(length=2**32 - 1), nullable=True),
+    Column("pergunta_ids", JSON),
+    Column("run_after", DateTime, index=True),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "llm_cache",
+    metadata,
+    Column("key", String(64), primary_key=True),
+    Column("response", Text(length=2**32 - 1)),
+    Column("size", Integer),
+    Column("hits", Integer),
+    Column("created_at", DateTime),
+    Column("last_used_at", DateTime, index=True),
+)
+
+
+def upgrade(conn):
+    # Existing databases already have these tables; checkfirst skips them.
+    metadata.create_all(conn, checkfirst=True)
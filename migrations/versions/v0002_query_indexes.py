@@ -0,0 +1,30 @@
+"""Composite indexes matching the controller's filter and paging columns."""
+
+from migrations.runner import ensure_indexes
+from sqlalchemy import Column, Index, MetaData, Table
+
+metadata = MetaData()
+
+temas = Table("temas", metadata, Column("owner_id"), Column("id"))
+fases = Table("fases", metadata, Column("tema_id"), Column("id"))
+perguntas = Table("perguntas", metadata, Column("fase_id"), Column("id"))
+alternativas = Table("alternativas", metadata, Column("pergunta_id"), Column("correta"))
+user_progress = Table("user_progress", metadata, Column("user_id"), Column("id"))
+jobs = Table("jobs", metadata, Column("status"), Column("run_after"))
+
+INDEXES = [
+    Index("ix_temas_owner_id_id", temas.c.owner_id, temas.c.id),
+    Index("ix_fases_tema_id_id", fases.c.tema_id, fases.c.id),
+    Index("ix_perguntas_fase_id_id", perguntas.c.fase_id, perguntas.c.id),
+    Index(
+        "ix_alternativas_pergunta_id_correta",
+        alternativas.c.pergunta_id,
+        alternativas.c.correta,
+    ),
+    Index("ix_user_progress_user_id_id", user_progress.c.user_id, user_progress.c.id),
+    Index("ix_jobs_status_run_after", jobs.c.status, jobs.c.run_after),
+]
+
+
+def upgrade(conn):
+    ensure_indexes(conn, *INDEXES)
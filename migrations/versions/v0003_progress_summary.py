@@ -0,0 +1,71 @@
+"""Progress summary table, backfilled from the existing user_progress rows."""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Integer,
+    MetaData,
+    Table,
+    case,
+    distinct,
+    func,
+    insert,
+    select,
+)
+
+metadata = MetaData()
+
+# Only the columns the backfill reads; the table itself comes from 0001.
+user_progress = Table(
+    "user_progress",
+    metadata,
+    Column("user_id", Integer),
+    Column("tema_id", Integer),
+    Column("fase_id", Integer),
+    Column("completed", Boolean),
+    Column("score", Integer),
+    Column("date_completed", DateTime),
+)
+
+Table("users", metadata, Column("id", Integer, primary_key=True))
+Table("temas", metadata, Column("id", Integer, primary_key=True))
+
+progress_summary = Table(
+    "progress_summary",
+    metadata,
+    Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Column("tema_id", Integer, ForeignKey("temas.id"), primary_key=True),
+    Column("attempts", Integer),
+    Column("best_score", Integer),
+    Column("completed_fases", Integer),
+    Column("last_completed_at", DateTime, nullable=True),
+)
+
+
+def upgrade(conn):
+    progress_summary.create(conn, checkfirst=True)
+    progress = user_progress.c
+    conn.execute(
+        insert(progress_summary).from_select(
+            [
+                "user_id",
+                "tema_id",
+                "attempts",
+                "best_score",
+                "completed_fases",
+                "last_completed_at",
+            ],
+            select(
+                progress.user_id,
+                progress.tema_id,
+                func.count(),
+                func.coalesce(func.max(progress.score), 0),
+                func.count(distinct(case((progress.completed, progress.fase_id)))),
+                func.max(progress.date_completed),
+            )
+            .filter(progress.user_id.is_not(None), progress.tema_id.is_not(None))
+            .group_by(progress.user_id, progress.tema_id),
+        )
+    )
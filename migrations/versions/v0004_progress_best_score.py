@@ -0,0 +1,124 @@
+"""Keep one best-score user_progress row per user and fase.
+
+Every existing row is first copied to user_progress_history, dated by its
+completion or, failing that, by the time of the migration; duplicates are
+then collapsed into the oldest row of each pair before the unique index is
+added.
+"""
+
+from migrations.runner import ensure_indexes
+from models.models import utcnow
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    update,
+)
+
+metadata = MetaData()
+
+user_progress = Table(
+    "user_progress",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer),
+    Column("tema_id", Integer),
+    Column("fase_id", Integer),
+    Column("completed", Boolean),
+    Column("score", Integer),
+    Column("date_completed", DateTime),
+)
+
+Table("users", metadata, Column("id", Integer, primary_key=True))
+
+user_progress_history = Table(
+    "user_progress_history",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("tema_id", Integer),
+    Column("fase_id", Integer),
+    Column("attempts", Integer),
+    Column("score", Integer),
+    Column("completed", Boolean),
+    Column("created_at", DateTime),
+    Index("ix_user_progress_history_user_id_fase_id", "user_id", "fase_id"),
+    Index("ix_user_progress_history_created_at", "created_at"),
+)
+
+UNIQUE_USER_FASE = Index(
+    "uq_user_progress_user_id_fase_id",
+    user_progress.c.user_id,
+    user_progress.c.fase_id,
+    unique=True,
+)
+
+
+def upgrade(conn):
+    user_progress_history.create(conn, checkfirst=True)
+    progress = user_progress.c
+    conn.execute(
+        insert(user_progress_history).from_select(
+            [
+                "user_id",
+                "tema_id",
+                "fase_id",
+                "attempts",
+                "score",
+                "completed",
+                "created_at",
+            ],
+            select(
+                progress.user_id,
+                progress.tema_id,
+                progress.fase_id,
+                1,
+                progress.score,
+                progress.completed,
+                func.coalesce(progress.date_completed, literal(utcnow(), DateTime)),
+            ),
+        )
+    )
+
+    groups = conn.execute(
+        select(
+            func.min(progress.id).label("keep_id"),
+            func.max(progress.score).label("score"),
+            func.max(case((progress.completed, 1), else_=0)).label("completed"),
+            func.min(progress.date_completed).label("date_completed"),
+            progress.user_id,
+            progress.fase_id,
+        )
+        .group_by(progress.user_id, progress.fase_id)
+        .having(func.count() > 1)
+    ).all()
+    for group in groups:
+        conn.execute(
+            update(user_progress)
+            .where(progress.id == group.keep_id)
+            .values(
+                score=group.score,
+                completed=bool(group.completed),
+                date_completed=group.date_completed,
+            )
+        )
+        conn.execute(
+            delete(user_progress).where(
+                progress.user_id == group.user_id,
+                progress.fase_id == group.fase_id,
+                progress.id != group.keep_id,
+            )
+        )
+
+    ensure_indexes(conn, UNIQUE_USER_FASE)
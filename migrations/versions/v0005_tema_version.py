@@ -0,0 +1,10 @@
+"""Per-tema version counter used for ETags."""
+
+from migrations.runner import add_columns
+from sqlalchemy import Column, Integer
+
+
+def upgrade(conn):
+    add_columns(
+        conn, "temas", Column("version", Integer, nullable=False, server_default="1")
+    )
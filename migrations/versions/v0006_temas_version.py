@@ -0,0 +1,29 @@
+"""Per-user theme version counter, so tema versions never repeat."""
+
+from migrations.runner import add_columns
+from sqlalchemy import Column, Integer, MetaData, Table, func, select, update
+
+metadata = MetaData()
+
+users = Table(
+    "users", metadata, Column("id", Integer), Column("temas_version", Integer)
+)
+temas = Table(
+    "temas", metadata, Column("owner_id", Integer), Column("version", Integer)
+)
+
+
+def upgrade(conn):
+    add_columns(
+        conn,
+        "users",
+        Column("temas_version", Integer, nullable=False, server_default="0"),
+    )
+    # Start each counter above every version its temas already hold.
+    conn.execute(
+        update(users).values(
+            temas_version=select(func.coalesce(func.max(temas.c.version), 0))
+            .where(temas.c.owner_id == users.c.id)
+            .scalar_subquery()
+        )
+    )
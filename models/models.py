@@ -1,9 +1,26 @@
 # models.py
+from datetime import datetime, timezone
+
 from settings.database import Base
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
 
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -11,6 +28,10 @@ class User(Base):
     username = Column(String(50), unique=True, index=True)
     email = Column(String(100), unique=True, index=True)
     password = Column(String(100))
+    # Bumped on every change to any of the user's temas, and on create and
+    # delete; each tema takes its new version from here, so versions (and the
+    # ETags built from them) never repeat even when a tema id is reused.
+    temas_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     temas = relationship("Tema", back_populates="owner")
     progress = relationship("UserProgress", back_populates="user")
@@ -23,9 +44,22 @@ class Tema(Base):
     nome = Column(String(100), index=True)
     descricao = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
+    # Bumped on every change to the tema or anything below it; drives ETags.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Composite indexes below follow the controller query shapes: filter on
+    # the parent key, then page or order by the primary key.
+    __table_args__ = (Index("ix_temas_owner_id_id", "owner_id", "id"),)
 
     owner = relationship("User", back_populates="temas")
-    fases = relationship("Fase", back_populates="tema", cascade="all, delete-orphan")
+    # Children load in id order; without order_by the order would follow
+    # whichever index the selectin query happens to read.
+    fases = relationship(
+        "Fase",
+        back_populates="tema",
+        cascade="all, delete-orphan",
+        order_by="Fase.id",
+    )
 
 
 class Fase(Base):
@@ -36,9 +70,14 @@ class Fase(Base):
     descricao = Column(Text, nullable=True)
     tema_id = Column(Integer, ForeignKey("temas.id"))
 
+    __table_args__ = (Index("ix_fases_tema_id_id", "tema_id", "id"),)
+
     tema = relationship("Tema", back_populates="fases")
     perguntas = relationship(
-        "Pergunta", back_populates="fase", cascade="all, delete-orphan"
+        "Pergunta",
+        back_populates="fase",
+        cascade="all, delete-orphan",
+        order_by="Pergunta.id",
     )
 
 
@@ -49,9 +88,14 @@ class Pergunta(Base):
     texto = Column(Text)
     fase_id = Column(Integer, ForeignKey("fases.id"))
 
+    __table_args__ = (Index("ix_perguntas_fase_id_id", "fase_id", "id"),)
+
     fase = relationship("Fase", back_populates="perguntas")
     alternativas = relationship(
-        "Alternativa", back_populates="pergunta", cascade="all, delete-orphan"
+        "Alternativa",
+        back_populates="pergunta",
+        cascade="all, delete-orphan",
+        order_by="Alternativa.id",
     )
 
 
@@ -63,6 +107,10 @@ class Alternativa(Base):
     correta = Column(Boolean, default=False)
     pergunta_id = Column(Integer, ForeignKey("perguntas.id"))
 
+    __table_args__ = (
+        Index("ix_alternativas_pergunta_id_correta", "pergunta_id", "correta"),
+    )
+
     pergunta = relationship("Pergunta", back_populates="alternativas")
 
 
@@ -77,4 +125,77 @@ class UserProgress(Base):
     score = Column(Integer, default=0)
     date_completed = Column(DateTime, nullable=True)
 
+    # One row per user and fase holding the best attempt; raw attempts go to
+    # user_progress_history.
+    __table_args__ = (
+        Index("ix_user_progress_user_id_id", "user_id", "id"),
+        Index("uq_user_progress_user_id_fase_id", "user_id", "fase_id", unique=True),
+    )
+
     user = relationship("User", back_populates="progress")
+
+
+class UserProgressHistory(Base):
+    """Append-only log of attempts; old rows are rolled up by the compactor."""
+
+    __tablename__ = "user_progress_history"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    tema_id = Column(Integer)
+    fase_id = Column(Integer)
+    # Attempts folded into this row: 1 for a raw attempt, more after rollup.
+    attempts = Column(Integer, default=1)
+    score = Column(Integer, default=0)
+    completed = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_user_progress_history_user_id_fase_id", "user_id", "fase_id"),
+        Index("ix_user_progress_history_created_at", "created_at"),
+    )
+
+
+class ProgressSummary(Base):
+    """Per user and tema rollup of user_progress, kept current on each attempt."""
+
+    __tablename__ = "progress_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tema_id = Column(Integer, ForeignKey("temas.id"), primary_key=True)
+    attempts = Column(Integer, default=0)
+    best_score = Column(Integer, default=0)
+    completed_fases = Column(Integer, default=0)
+    last_completed_at = Column(DateTime, nullable=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    fase_id = Column(Integer)
+    status = Column(String(20), default="queued", index=True)
+    attempts = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    # Uploaded PDF, kept until the job finishes so a restart can resume it.
+    payload = Column(LargeBinary(length=2**32 - 1), nullable=True)
+    pergunta_ids = Column(JSON, default=list)
+    # Earliest time the job may be claimed: the retry backoff while queued,
+    # the lease expiry while running.
+    run_after = Column(DateTime, default=utcnow, index=True)
+    created_at = Column(DateTime, default=utcnow)
+
+    # Matches the claim query: status IN (...) AND run_after <= now.
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)
+    response = Column(Text(length=2**32 - 1))
+    size = Column(Integer)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=utcnow)
+    last_used_at = Column(DateTime, default=utcnow, index=True)
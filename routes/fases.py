@@ -1,24 +1,28 @@
-from typing import List
+from typing import List, Optional
 
 from auth.auth import get_current_user
 from controller import controller as crud
-from fastapi import APIRouter, Depends, HTTPException
-from models import models
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from schemas import schemas
+from services.etag import make_etag, not_modified, set_etag
+from services.pagination import decode_cursor, set_next_cursor
+from services.views import render, select_view
 from settings.database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
+FASE_MAX_DEPTH = len(schemas.FASE_DEPTHS) - 1
+
 
 @router.post("/temas/{tema_id}/fases/", response_model=schemas.Fase)
-def create_fase(
+async def create_fase(
     tema_id: int,
     fase: schemas.FaseCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_fase = crud.create_fase(db, fase, tema_id, current_user.id)
+    db_fase = await crud.create_fase(db, fase, tema_id, current_user.id)
     if db_fase is None:
         raise HTTPException(
             status_code=404, detail="Tema not found or not owned by user"
@@ -27,48 +31,80 @@ def create_fase(
 
 
 @router.get("/temas/{tema_id}/fases/", response_model=List[schemas.Fase])
-def read_fases(
+async def read_fases(
     tema_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    depth: int = Query(FASE_MAX_DEPTH, ge=0, le=FASE_MAX_DEPTH),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    return crud.get_fases_by_tema(db, tema_id, current_user.id, skip, limit)
+    """List a theme's phases; ``depth`` and ``fields`` trim the returned tree."""
+    depth, schema, include = select_view(
+        schemas.FASE_DEPTHS, depth, fields, "perguntas"
+    )
+    version = await crud.get_tema_version(db, tema_id, current_user.id)
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    fases = await crud.get_fases_by_tema(
+        db, tema_id, current_user.id, skip, limit, decode_cursor(cursor), depth
+    )
+    response = render(schema, fases, include)
+    set_next_cursor(response, fases, limit)
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/fases/{fase_id}", response_model=schemas.Fase)
-def read_fase(
+async def read_fase(
     fase_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    depth: int = Query(FASE_MAX_DEPTH, ge=0, le=FASE_MAX_DEPTH),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_fase = crud.get_fase(db, fase_id, current_user.id)
+    depth, schema, include = select_view(
+        schemas.FASE_DEPTHS, depth, fields, "perguntas"
+    )
+    version = await crud.get_fase_version(db, fase_id, current_user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Fase not found")
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    db_fase = await crud.get_fase(db, fase_id, current_user.id, depth)
     if db_fase is None:
         raise HTTPException(status_code=404, detail="Fase not found")
-    return db_fase
+    response = render(schema, db_fase, include)
+    set_etag(response, etag)
+    return response
 
 
 @router.put("/fases/{fase_id}", response_model=schemas.Fase)
-def update_fase(
+async def update_fase(
     fase_id: int,
     fase: schemas.FaseCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_fase = crud.update_fase(db, fase_id, fase, current_user.id)
+    db_fase = await crud.update_fase(db, fase_id, fase, current_user.id)
     if db_fase is None:
         raise HTTPException(status_code=404, detail="Fase not found")
     return db_fase
 
 
 @router.delete("/fases/{fase_id}")
-def delete_fase(
+async def delete_fase(
     fase_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    success = crud.delete_fase(db, fase_id, current_user.id)
+    success = await crud.delete_fase(db, fase_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Fase not found")
     return {"detail": "Fase deleted successfully"}
@@ -0,0 +1,34 @@
+from auth.auth import password_hasher, principal_cache
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services.answer_key import answer_keys
+from services.llm_cache import llm_cache
+from services.metrics import metrics
+from settings.database import pool_stats
+
+router = APIRouter()
+
+
+@router.get("/health/pool")
+async def read_pool_stats():
+    """Live connection pool metrics for this worker."""
+    return pool_stats()
+
+
+@router.get("/health/stats")
+async def read_stats():
+    """Cache and worker-pool counters for this worker."""
+    return {
+        "principal_cache": principal_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "llm_cache": llm_cache.stats(),
+        "answer_keys": answer_keys.stats(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Request and SQL metrics for all workers, in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
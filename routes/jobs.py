@@ -0,0 +1,20 @@
+from auth.auth import get_current_user
+from controller import controller as crud
+from fastapi import APIRouter, Depends, HTTPException
+from schemas import schemas
+from settings.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.Job)
+async def read_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    db_job = await crud.get_job(db, job_id, current_user.id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
@@ -1,26 +1,40 @@
-import tempfile
-from typing import List
+from typing import List, Optional
 
 from auth.auth import get_current_user
 from controller import controller as crud
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from models import models
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 from schemas import schemas
-from services.json_llm import generate_json_pdf
+from services.etag import make_etag, not_modified, set_etag
+from services.jobs import job_queue
+from services.pagination import decode_cursor, set_next_cursor
+from services.views import render
 from settings.database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
+MAX_PDF_BYTES = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_PDF_BYTES) -> bytearray:
+    """Read an upload in chunks, rejecting it as soon as it exceeds max_bytes."""
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        content += chunk
+        if len(content) > max_bytes:
+            raise HTTPException(status_code=413, detail="PDF file is too large")
+    return content
+
 
 @router.post("/fases/{fase_id}/perguntas/", response_model=schemas.Pergunta)
-def create_pergunta(
+async def create_pergunta(
     fase_id: int,
     pergunta: schemas.PerguntaCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_pergunta = crud.create_pergunta(db, pergunta, fase_id, current_user.id)
+    db_pergunta = await crud.create_pergunta(db, pergunta, fase_id, current_user.id)
     if db_pergunta is None:
         raise HTTPException(
             status_code=404, detail="Fase not found or validation error"
@@ -29,36 +43,57 @@ def create_pergunta(
 
 
 @router.get("/fases/{fase_id}/perguntas/", response_model=List[schemas.Pergunta])
-def read_perguntas(
+async def read_perguntas(
     fase_id: int,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    return crud.get_perguntas_by_fase(db, fase_id, current_user.id, skip, limit)
+    version = await crud.get_fase_version(db, fase_id, current_user.id)
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    perguntas = await crud.get_perguntas_by_fase(
+        db, fase_id, current_user.id, skip, limit, decode_cursor(cursor)
+    )
+    response = render(schemas.Pergunta, perguntas)
+    set_next_cursor(response, perguntas, limit)
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/perguntas/{pergunta_id}", response_model=schemas.Pergunta)
-def read_pergunta(
+async def read_pergunta(
     pergunta_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_pergunta = crud.get_pergunta(db, pergunta_id, current_user.id)
+    version = await crud.get_pergunta_version(db, pergunta_id, current_user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Pergunta not found")
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    db_pergunta = await crud.get_pergunta(db, pergunta_id, current_user.id)
     if db_pergunta is None:
         raise HTTPException(status_code=404, detail="Pergunta not found")
-    return db_pergunta
+    response = render(schemas.Pergunta, db_pergunta)
+    set_etag(response, etag)
+    return response
 
 
 @router.put("/perguntas/{pergunta_id}", response_model=schemas.Pergunta)
-def update_pergunta(
+async def update_pergunta(
     pergunta_id: int,
     pergunta: schemas.PerguntaCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_pergunta = crud.update_pergunta(db, pergunta_id, pergunta, current_user.id)
+    db_pergunta = await crud.update_pergunta(db, pergunta_id, pergunta, current_user.id)
     if db_pergunta is None:
         raise HTTPException(
             status_code=404, detail="Pergunta not found or validation error"
@@ -67,56 +102,46 @@ def update_pergunta(
 
 
 @router.delete("/perguntas/{pergunta_id}")
-def delete_pergunta(
+async def delete_pergunta(
     pergunta_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    success = crud.delete_pergunta(db, pergunta_id, current_user.id)
+    success = await crud.delete_pergunta(db, pergunta_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Pergunta not found")
     return {"detail": "Pergunta deleted successfully"}
 
 
 @router.post("/perguntas/{pergunta_id}/check")
-def check_answer(
+async def check_answer(
     pergunta_id: int,
     alternativa_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    result = crud.check_resposta(db, pergunta_id, alternativa_id, current_user.id)
+    result = await crud.check_resposta(db, pergunta_id, alternativa_id, current_user.id)
     return result
 
 
 @router.post(
-    "/fases/{fase_id}/perguntas/multiple", response_model=List[schemas.Pergunta]
+    "/fases/{fase_id}/perguntas/multiple",
+    response_model=schemas.Job,
+    status_code=202,
 )
 async def create_multiple_perguntas_for_fase(
     fase_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: schemas.User = Depends(get_current_user),
 ):
+    """Queue question generation from a PDF; poll /jobs/{id} for the result."""
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-        content = await file.read()
-        temp_file.write(content)
-        temp_path = temp_file.name
-
-    questions_data = await generate_json_pdf(temp_path)
-
-    perguntas_list: List[schemas.PerguntaSimpleCreate] = questions_data
-
-    """Create multiple questions for a phase at once"""
-    result = crud.create_multiple_perguntas(
-        db, perguntas_list, fase_id, current_user.id
-    )
-    if result is None:
-        raise HTTPException(
-            status_code=404,
-            detail="Fase not found or validation error in questions data",
-        )
-    return result
+    content = await read_upload(file)
+    db_job = await crud.create_job(db, content, fase_id, current_user.id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Fase not found")
+    job_queue.notify()
+    return db_job
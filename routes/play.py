@@ -0,0 +1,35 @@
+from auth.auth import get_current_user
+from controller import controller as crud
+from fastapi import APIRouter, Depends, HTTPException
+from schemas import schemas
+from settings.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+
+router = APIRouter()
+
+
+@router.get("/fases/{fase_id}/play", response_model=schemas.PlaySession)
+async def start_play(
+    fase_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    """Questions of a phase, ready to play: shuffled and without answers."""
+    session = await crud.get_play_session(db, fase_id, current_user.id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Fase not found")
+    return session
+
+
+@router.post("/fases/{fase_id}/play", response_model=schemas.PlayResult)
+async def submit_play(
+    fase_id: int,
+    submit: schemas.PlaySubmit,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    """Grade all answers at once and record the attempt as progress."""
+    result = await crud.submit_play(db, fase_id, submit.respostas, current_user.id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Fase not found")
+    return result
@@ -1,67 +1,99 @@
-from typing import List
+from typing import List, Optional
 
 from auth.auth import get_current_user
 from controller import controller as crud
-from fastapi import APIRouter, Depends, HTTPException
-from models import models
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from schemas import schemas
+from services.etag import make_etag, not_modified, set_etag
+from services.pagination import decode_cursor, set_next_cursor
+from services.views import render, select_view
 from settings.database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
+TEMA_MAX_DEPTH = len(schemas.TEMA_DEPTHS) - 1
+
 
 @router.post("/temas/", response_model=schemas.Tema)
-def create_tema(
+async def create_tema(
     tema: schemas.TemaCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    return crud.create_tema(db, tema, current_user.id)
+    return await crud.create_tema(db, tema, current_user.id)
 
 
 @router.get("/temas/", response_model=List[schemas.Tema])
-def read_temas(
+async def read_temas(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    depth: int = Query(TEMA_MAX_DEPTH, ge=0, le=TEMA_MAX_DEPTH),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    return crud.get_temas_by_user(db, current_user.id, skip, limit)
+    """List themes; ``depth`` and ``fields`` trim the returned tree."""
+    depth, schema, include = select_view(schemas.TEMA_DEPTHS, depth, fields, "fases")
+    version = await crud.get_temas_version(db, current_user.id)
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    temas = await crud.get_temas_by_user(
+        db, current_user.id, skip, limit, decode_cursor(cursor), depth
+    )
+    response = render(schema, temas, include)
+    set_next_cursor(response, temas, limit)
+    set_etag(response, etag)
+    return response
 
 
 @router.get("/temas/{tema_id}", response_model=schemas.Tema)
-def read_tema(
+async def read_tema(
     tema_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    request: Request,
+    depth: int = Query(TEMA_MAX_DEPTH, ge=0, le=TEMA_MAX_DEPTH),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_tema = crud.get_tema(db, tema_id, current_user.id)
+    depth, schema, include = select_view(schemas.TEMA_DEPTHS, depth, fields, "fases")
+    version = await crud.get_tema_version(db, tema_id, current_user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Tema not found")
+    etag = make_etag(request, current_user.id, version)
+    if cached := not_modified(request, etag):
+        return cached
+    db_tema = await crud.get_tema(db, tema_id, current_user.id, depth)
     if db_tema is None:
         raise HTTPException(status_code=404, detail="Tema not found")
-    return db_tema
+    response = render(schema, db_tema, include)
+    set_etag(response, etag)
+    return response
 
 
 @router.put("/temas/{tema_id}", response_model=schemas.Tema)
-def update_tema(
+async def update_tema(
     tema_id: int,
     tema: schemas.TemaCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    db_tema = crud.update_tema(db, tema_id, tema, current_user.id)
+    db_tema = await crud.update_tema(db, tema_id, tema, current_user.id)
     if db_tema is None:
         raise HTTPException(status_code=404, detail="Tema not found")
     return db_tema
 
 
 @router.delete("/temas/{tema_id}")
-def delete_tema(
+async def delete_tema(
     tema_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
 ):
-    success = crud.delete_tema(db, tema_id, current_user.id)
+    success = await crud.delete_tema(db, tema_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Tema not found")
     return {"detail": "Tema deleted successfully"}
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class AlternativaBase(BaseModel):
@@ -17,8 +17,7 @@ class Alternativa(AlternativaBase):
     id: int
     pergunta_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PerguntaBase(BaseModel):
@@ -42,8 +41,7 @@ class Pergunta(PerguntaBase):
     fase_id: int
     alternativas: List[Alternativa]
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class FaseBase(BaseModel):
@@ -60,8 +58,7 @@ class Fase(FaseBase):
     tema_id: int
     perguntas: List[Pergunta] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TemaBase(BaseModel):
@@ -77,8 +74,45 @@ class Tema(TemaBase):
     id: int
     fases: List[Fase] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Lighter views of the tema tree for list screens. Index i of TEMA_DEPTHS and
+# FASE_DEPTHS is the schema that stops i levels below the root.
+class PerguntaSummary(PerguntaBase):
+    id: int
+    fase_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FaseSummary(FaseBase):
+    id: int
+    tema_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FaseWithPerguntas(FaseSummary):
+    perguntas: List[PerguntaSummary] = []
+
+
+class TemaSummary(TemaBase):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TemaWithFases(TemaSummary):
+    fases: List[FaseSummary] = []
+
+
+class TemaWithPerguntas(TemaSummary):
+    fases: List[FaseWithPerguntas] = []
+
+
+TEMA_DEPTHS = (TemaSummary, TemaWithFases, TemaWithPerguntas, Tema)
+FASE_DEPTHS = (FaseSummary, FaseWithPerguntas, Fase)
 
 
 class UserBase(BaseModel):
@@ -93,8 +127,7 @@ class UserCreate(UserBase):
 class User(UserBase):
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel):
@@ -122,8 +155,63 @@ class UserProgress(UserProgressBase):
     user_id: int
     date_completed: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ProgressSummary(BaseModel):
+    tema_id: int
+    attempts: int
+    best_score: int
+    completed_fases: int
+    last_completed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PlayAlternativa(BaseModel):
+    id: int
+    texto: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PlayPergunta(BaseModel):
+    id: int
+    texto: str
+    alternativas: List[PlayAlternativa]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PlaySession(BaseModel):
+    id: int
+    tema_id: int
+    nome: str
+    perguntas: List[PlayPergunta]
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class Resposta(BaseModel):
+    pergunta_id: int
+    alternativa_id: int
+
+
+class PlaySubmit(BaseModel):
+    respostas: List[Resposta]
+
+
+class RespostaResult(Resposta):
+    correta: bool
+    resposta_correta: Optional[int] = None
+
+
+class PlayResult(BaseModel):
+    score: int
+    total: int
+    completed: bool
+    resultados: List[RespostaResult]
+    progress: UserProgress
 
 
 class PerguntaSimpleCreate(BaseModel):
@@ -141,3 +229,14 @@ class PerguntaSimpleCreate(BaseModel):
 
 class MultiplePerguntas(BaseModel):
     perguntas: List[PerguntaSimpleCreate]
+
+
+class Job(BaseModel):
+    id: str
+    fase_id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    pergunta_ids: List[int] = []
+
+    model_config = ConfigDict(from_attributes=True)
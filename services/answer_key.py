@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import FrozenSet, NamedTuple, Optional
+
+from models.models import Alternativa, Pergunta
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+
+class AnswerKey(NamedTuple):
+    correct_id: Optional[int]
+    valid_ids: FrozenSet[int]
+    owner_id: int
+    tema_id: int
+    version: int
+
+
+class AnswerKeyIndex:
+    """LRU map of pergunta_id -> AnswerKey.
+
+    Invalidation below only reaches this process, so entries also carry the
+    tema version they were loaded at; readers compare it with the current
+    version to catch writes made by other workers.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, pergunta_id: int):
+        entry = self._entries.get(pergunta_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(pergunta_id)
+        self.hits += 1
+        return entry
+
+    def set(
+        self,
+        pergunta_id: int,
+        correct_id,
+        valid_ids,
+        owner_id: int,
+        tema_id: int,
+        version: int,
+    ):
+        entry = AnswerKey(correct_id, frozenset(valid_ids), owner_id, tema_id, version)
+        self._entries[pergunta_id] = entry
+        self._entries.move_to_end(pergunta_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, pergunta_id: int):
+        self._entries.pop(pergunta_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+answer_keys = AnswerKeyIndex()
+
+
+def _mark_stale(target, pergunta_id):
+    # Drop the entry now, and again once the transaction commits, so a
+    # concurrent reader cannot re-cache the pre-commit answer key.
+    answer_keys.invalidate(pergunta_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_answer_keys", set()).add(pergunta_id)
+
+
+@event.listens_for(Pergunta, "after_update")
+@event.listens_for(Pergunta, "after_delete")
+def _pergunta_changed(mapper, connection, target):
+    _mark_stale(target, target.id)
+
+
+@event.listens_for(Alternativa, "after_insert")
+@event.listens_for(Alternativa, "after_update")
+@event.listens_for(Alternativa, "after_delete")
+def _alternativa_changed(mapper, connection, target):
+    if target.pergunta_id is not None:
+        _mark_stale(target, target.pergunta_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for pergunta_id in session.info.pop("stale_answer_keys", ()):
+        answer_keys.invalidate(pergunta_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_stale(session, previous_transaction):
+    session.info.pop("stale_answer_keys", None)
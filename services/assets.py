@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from fastapi import Request, Response
+from middleware.compression import brotli, choose_encoding, encoded_etag
+from services.etag import etag_matches
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = "templates/static/assets"
+STATIC_URL = "/static"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Only text-like assets are worth precompressing; images are already packed.
+PRECOMPRESS_TYPES = (
+    "text/",
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+)
+
+
+def digest(data: bytes, length: int = 12) -> str:
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def encode_variants(data: bytes, content_type: str):
+    """Precompressed bodies by encoding, for the types that benefit."""
+    if not content_type.startswith(PRECOMPRESS_TYPES):
+        return {}
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {
+        encoding: body for encoding, body in variants.items() if len(body) < len(data)
+    }
+
+
+def encoded_response(
+    request: Request, body: bytes, variants, headers: dict, media_type
+):
+    """Send the best precompressed variant the client accepts."""
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    headers = {**headers, "Vary": "Accept-Encoding"} if variants else headers
+    if encoding in variants:
+        body = variants[encoding]
+        headers = {**headers, "Content-Encoding": encoding}
+        if "ETag" in headers:
+            headers["ETag"] = encoded_etag(headers["ETag"], encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles that also serves content-hashed names as immutable.
+
+    ``url(path)`` maps ``img/logo.png`` to ``/static/img/logo.<hash>.png``.
+    Those URLs change whenever the file does, so they are cached for a year;
+    the plain names keep working with the usual revalidation.
+    """
+
+    def __init__(self, directory: str = STATIC_DIR, prefix: str = STATIC_URL):
+        super().__init__(directory=directory)
+        self.prefix = prefix
+        self.urls = {}
+        self.assets = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                with open(full_path, "rb") as f:
+                    data = f.read()
+                stem, ext = os.path.splitext(path)
+                fingerprint = digest(data)
+                hashed = f"{stem}.{fingerprint}{ext}"
+                content_type = (
+                    mimetypes.guess_type(name)[0] or "application/octet-stream"
+                )
+                self.urls[path] = f"{prefix}/{hashed}"
+                self.assets[hashed] = (
+                    data,
+                    content_type,
+                    encode_variants(data, content_type),
+                    f'"{fingerprint}"',
+                )
+
+    def url(self, path: str) -> str:
+        return self.urls.get(path, f"{self.prefix}/{path}")
+
+    async def get_response(self, path: str, scope) -> Response:
+        asset = self.assets.get(path)
+        if asset is None:
+            return await super().get_response(path, scope)
+        data, content_type, variants, etag = asset
+        request = Request(scope)
+        headers = {"Cache-Control": IMMUTABLE, "ETag": etag}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return encoded_response(request, data, variants, headers, content_type)
+
+
+class PrerenderedPage:
+    """A template rendered once at startup and served from memory."""
+
+    def __init__(self, templates, name: str, **context):
+        self.body = templates.get_template(name).render(**context).encode()
+        self.etag = f'"{digest(self.body, 16)}"'
+        self.variants = encode_variants(self.body, "text/html")
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": REVALIDATE}
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        return encoded_response(
+            request, self.body, self.variants, headers, "text/html; charset=utf-8"
+        )
@@ -1,39 +1,91 @@
 import json
 import re
 
+MAX_QUESTOES = 9
+MAX_REPAROS = 4
+# JSONDecodeError costs O(position) to build, so cap failures per scan.
+MAX_FALHAS = 64
+
+_decoder = json.JSONDecoder()
+_INICIO_QUESTAO = re.compile(r'\{\s*"texto"\s*:')
+
 
 def padronizar_json(json_entrada):
     if isinstance(json_entrada, (dict, list)):
         if isinstance(json_entrada, list):
-            return [processar_questao(q) for q in json_entrada[:9]]
+            return [processar_questao(q) for q in json_entrada[:MAX_QUESTOES]]
         else:
             return processar_questao(json_entrada)
 
     if isinstance(json_entrada, str):
-        padrao = (
-            r'\{\s*"texto"\s*:.*?"alternativas"\s*:\s*\[\s*(\{.*?\}\s*,?\s*)+\s*\]\s*\}'
-        )
-        matches = re.finditer(padrao, json_entrada, re.DOTALL)
-
-        questoes = []
-        for match in matches:
-            json_str = match.group(0)
-            try:
-                questao = json.loads(json_str)
-                questao_processada = processar_questao(questao)
-                if questao_processada["texto"] and questao_processada["alternativas"]:
-                    questoes.append(questao_processada)
-                    if len(questoes) >= 9:
-                        break
-            except json.JSONDecodeError:
-                continue
-
+        questoes = extrair_questoes(json_entrada)
         if questoes:
             return questoes
 
     return {"texto": "", "alternativas": []}
 
 
+def extrair_questoes(texto):
+    """Extract question objects from raw model output in linear time.
+
+    Models often drop the comma between alternatives. Each scan records
+    where the decoder expected one; the commas are inserted and the text
+    rescanned, at most MAX_REPAROS times.
+    """
+    questoes = []
+    for _ in range(MAX_REPAROS + 1):
+        questoes, virgulas = _varrer(texto)
+        if not virgulas or len(questoes) >= MAX_QUESTOES:
+            break
+        texto = _inserir_virgulas(texto, virgulas)
+    return questoes
+
+
+def _varrer(texto):
+    questoes = []
+    virgulas = []
+    pos = 0
+    falhas = 0
+    while len(questoes) < MAX_QUESTOES:
+        match = _INICIO_QUESTAO.search(texto, pos)
+        if match is None:
+            break
+        inicio = match.start()
+        try:
+            objeto, fim = _decoder.raw_decode(texto, inicio)
+        except json.JSONDecodeError as e:
+            falhas += 1
+            if falhas > MAX_FALHAS:
+                break
+            if e.msg == "Expecting ',' delimiter":
+                virgulas.append(e.pos)
+            # Everything up to e.pos belongs to the broken object; resuming
+            # there keeps the scan linear.
+            pos = max(e.pos, inicio + 1)
+            continue
+        except RecursionError:
+            # Nesting this deep is not a question list; every later
+            # candidate sits inside the same structure.
+            break
+        pos = fim
+        if isinstance(objeto, dict) and "alternativas" in objeto:
+            questao = processar_questao(objeto)
+            if questao["texto"] and questao["alternativas"]:
+                questoes.append(questao)
+    return questoes, virgulas
+
+
+def _inserir_virgulas(texto, posicoes):
+    partes = []
+    anterior = 0
+    for pos in sorted(set(posicoes)):
+        partes.append(texto[anterior:pos])
+        partes.append(",")
+        anterior = pos
+    partes.append(texto[anterior:])
+    return "".join(partes)
+
+
 def processar_questao(questao):
     questao_padrao = {"texto": "", "alternativas": []}
 
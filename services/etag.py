@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from middleware.compression import CONTENT_ENCODINGS, encoded_etag
+
+# Bump when response shapes change, so old ETags stop matching.
+ETAG_SCHEMA_VERSION = 2
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(request: Request, user_id: int, version) -> str:
+    """Strong ETag for a read, from the URL, the user and the data version."""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    key = f"{ETAG_SCHEMA_VERSION}|{user_id}|{request.url.path}?{query}|{version}"
+    return '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    # Compressed representations carry the same ETag with an encoding suffix.
+    return etag in candidates or any(
+        encoded_etag(etag, encoding) in candidates for encoding in CONTENT_ENCODINGS
+    )
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 when the client already holds this version."""
+    if etag_matches(request, etag):
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        )
+    return None
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from controller import controller as crud
+from models.models import Job, utcnow
+from services.json_llm import PdfLimitError, generate_json_pdf
+from settings.database import SessionLocal
+from sqlalchemy import select, update
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 3
+JOB_LEASE_SECONDS = 600
+JOB_RETRY_DELAY_SECONDS = 30
+JOB_POLL_SECONDS = 5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """In-process worker pool over the persistent ``jobs`` table.
+
+    Workers claim jobs with a conditional UPDATE, so several uvicorn workers
+    can share the table. A running job holds a lease; if the process dies,
+    the lease expires and another worker picks the job up again.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = JOB_WORKERS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _worker(self):
+        while True:
+            try:
+                job_id = await self._claim_next()
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job_id = None
+            if job_id is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_SECONDS)
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            await self._run(job_id)
+
+    async def _claim_next(self):
+        async with self.session_factory() as db:
+            while True:
+                now = utcnow()
+                result = await db.execute(
+                    select(Job.id, Job.attempts)
+                    .filter(Job.status.in_((QUEUED, RUNNING)), Job.run_after <= now)
+                    .order_by(Job.created_at)
+                    .limit(1)
+                )
+                row = result.first()
+                if row is None:
+                    return None
+                claimable = (
+                    update(Job)
+                    .where(Job.id == row.id, Job.attempts == row.attempts)
+                    .where(Job.status.in_((QUEUED, RUNNING)), Job.run_after <= now)
+                )
+                if row.attempts >= self.max_attempts:
+                    # A worker died holding this job too many times.
+                    await db.execute(
+                        claimable.values(
+                            status=FAILED, error="Too many attempts", payload=None
+                        )
+                    )
+                    await db.commit()
+                    continue
+                claimed = await db.execute(
+                    claimable.values(
+                        status=RUNNING,
+                        attempts=row.attempts + 1,
+                        run_after=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                    )
+                )
+                await db.commit()
+                if claimed.rowcount == 1:
+                    return row.id
+
+    async def _renew_lease(self, job_id: str, attempts: int):
+        """Keep extending a running job's lease while this worker holds it."""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                async with self.session_factory() as db:
+                    renewed = await db.execute(
+                        update(Job)
+                        .where(
+                            Job.id == job_id,
+                            Job.attempts == attempts,
+                            Job.status == RUNNING,
+                        )
+                        .values(
+                            run_after=utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)
+                        )
+                    )
+                    await db.commit()
+            except Exception:
+                logger.exception("Failed to renew the lease of job %s", job_id)
+                continue
+            if renewed.rowcount != 1:
+                logger.warning("Job %s lost its lease", job_id)
+                return
+
+    async def _run(self, job_id: str):
+        async with self.session_factory() as db:
+            job = await db.get(Job, job_id)
+            if job is None:
+                return
+            attempts = job.attempts
+            lease = asyncio.create_task(self._renew_lease(job_id, attempts))
+            try:
+                questions = await generate_json_pdf(job.payload)
+                perguntas = await crud.create_multiple_perguntas(
+                    db, questions, job.fase_id, job.owner_id
+                )
+            except PdfLimitError as e:
+                values = {"status": FAILED, "error": str(e), "payload": None}
+            except Exception as e:
+                logger.exception("Job %s failed on attempt %d", job_id, attempts)
+                if attempts >= self.max_attempts:
+                    values = {"status": FAILED, "error": str(e), "payload": None}
+                else:
+                    delay = JOB_RETRY_DELAY_SECONDS * attempts
+                    values = {
+                        "status": QUEUED,
+                        "error": str(e),
+                        "run_after": utcnow() + timedelta(seconds=delay),
+                    }
+            else:
+                if perguntas is None:
+                    values = {
+                        "status": FAILED,
+                        "error": "Fase not found or validation error in questions data",
+                        "payload": None,
+                    }
+                else:
+                    values = {
+                        "status": DONE,
+                        "error": None,
+                        "payload": None,
+                        "pergunta_ids": [p.id for p in perguntas],
+                    }
+            finally:
+                lease.cancel()
+                await asyncio.gather(lease, return_exceptions=True)
+            if values["status"] != DONE:
+                await db.rollback()
+            # The questions and the job outcome commit together, and only
+            # while this worker still holds the claim; if the lease was lost
+            # and the job reclaimed, nothing from this run is kept.
+            finished = await db.execute(
+                update(Job)
+                .where(
+                    Job.id == job_id, Job.attempts == attempts, Job.status == RUNNING
+                )
+                .values(**values)
+            )
+            if finished.rowcount != 1:
+                logger.warning("Job %s was reclaimed; discarding this run", job_id)
+                await db.rollback()
+                return
+            await db.commit()
+
+
+job_queue = JobQueue()
@@ -1,32 +1,77 @@
-import os
-from typing import Tuple
+import asyncio
+import json
+import logging
+import math
+from functools import cache
+from typing import Iterator, List, Tuple
 
 import fitz
 from gradio_client import Client
 from services.default_json import padronizar_json
+from services.llm_cache import llm_cache, make_key
+
+logger = logging.getLogger(__name__)
+
+MAX_PDF_PAGES = 300
+
+
+class PdfLimitError(ValueError):
+    pass
+
+
+def iter_pdf_pages(pdf_bytes, max_pages: int = MAX_PDF_PAGES) -> Iterator[str]:
+    """Yield the text of each page without holding the whole document text."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        if doc.page_count > max_pages:
+            raise PdfLimitError(f"O PDF excede o limite de {max_pages} páginas")
+        for page in doc:
+            yield page.get_text()
 
 
 def analyze_pdf(
-    pdf_path: str,
+    pdf_bytes,
 ) -> Tuple[str, dict]:
-    if not os.path.exists(pdf_path):
-        raise FileNotFoundError(f"O arquivo PDF não foi encontrado: {pdf_path}")
-
-    extracted_text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            extracted_text += page.get_text()
-        doc.close()
+        extracted_text = "".join(iter_pdf_pages(pdf_bytes))
+    except PdfLimitError:
+        raise
     except Exception as e:
         raise Exception(f"Erro ao extrair texto do PDF: {str(e)}")
 
-    print(extracted_text)
     return extracted_text, {}
 
 
-client = Client("wendellast/Quiz")
+MODEL_NAME = "wendellast/Quiz"
+# Bump whenever the prompt template changes so cached outputs are not reused.
+PROMPT_VERSION = 2
+SAMPLING_PARAMS = {
+    "system_message": "",
+    "max_tokens": 712,
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "api_name": "/chat",
+}
+
+MAX_PERGUNTAS = 9
+# Rough budget for the document text sent in one prompt, in tokens.
+CHUNK_TOKENS = 1500
+CHARS_PER_TOKEN = 4
+MAX_CHUNKS = 18
+LLM_CONCURRENCY = 4
+# A hung call only abandons its thread; the job fails and is retried.
+LLM_TIMEOUT_SECONDS = 120
+
+
+@cache
+def get_client() -> Client:
+    # Connecting fetches the Space's API description over the network, so it
+    # waits for the first generation instead of running at import.
+    return Client(MODEL_NAME)
+
+
+def predict(prompt: str):
+    return get_client().predict(message=prompt, **SAMPLING_PARAMS)
+
 
 exemple_json = """
    
@@ -53,9 +98,9 @@ exemple_json = """
 """
 
 
-async def bott(text, ask=exemple_json):
+async def bott(text, ask=exemple_json, quantidade=MAX_PERGUNTAS):
     prompt = f"""
-    - Analise o texto abaixo e gere exatamente 9 perguntas sobre o conteúdo do texto.
+    - Analise o texto abaixo e gere exatamente {quantidade} perguntas sobre o conteúdo do texto.
     - Cada pergunta vai ter exatamente 4 alternativas e apenas uma delas será a correta.
     - a resposta correta deve ser marcada com o atributo "correta" como true.
     - As perguntas devem ser geradas no formato JSON.
@@ -67,28 +112,130 @@ async def bott(text, ask=exemple_json):
         
     - Retorne apenas o json com as perguntas e alternativas. 
     - Não inclua nada além do JSON com as perguntas e alternativas.
-    - Não gere mais de 9 perguntas, e nem mais de 4 alternativas
+    - Não gere mais de {quantidade} perguntas, e nem mais de 4 alternativas
 """
 
-    result = client.predict(
-        message=prompt,
-        system_message="",
-        max_tokens=712,
-        temperature=0.7,
-        top_p=0.95,
-        api_name="/chat",
+    cache_key = make_key(
+        text,
+        model=MODEL_NAME,
+        prompt_version=PROMPT_VERSION,
+        quantidade=quantidade,
+        **SAMPLING_PARAMS,
+    )
+    cached = await llm_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # gradio_client is blocking; keep the remote call off the event loop.
+    result = await asyncio.wait_for(
+        asyncio.to_thread(predict, prompt), LLM_TIMEOUT_SECONDS
     )
 
-    print(result)
+    logger.debug("Model output: %s", result)
 
+    # Sampling is random, so a malformed answer is worth retrying next time
+    # rather than pinning it in the cache.
+    if tem_questao_completa(padronizar_json(result)):
+        raw = result if isinstance(result, str) else json.dumps(result)
+        await llm_cache.set(cache_key, raw)
     return result
 
 
-async def generate_json_pdf(pdf_path):
-    text, _ = analyze_pdf(pdf_path)
-    result = await bott(text, ask=exemple_json)
-    resul_perfect = padronizar_json(result)
-    print(result)
-    print("=-=" * 20)
-    print(resul_perfect)
-    return resul_perfect
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split text on word boundaries into chunks that fit the token budget."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    size = 0
+    for word in text.split():
+        if current and size + len(word) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current = []
+            size = 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def select_chunks(chunks: List[str], max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Pick evenly spaced chunks so long documents are covered end to end."""
+    if len(chunks) <= max_chunks:
+        return chunks
+    step = len(chunks) / max_chunks
+    return [chunks[int(i * step)] for i in range(max_chunks)]
+
+
+def questao_completa(questao) -> bool:
+    alternativas = questao.get("alternativas", [])
+    return (
+        bool(questao.get("texto"))
+        and len(alternativas) == 4
+        and sum(1 for alt in alternativas if alt["correta"]) == 1
+    )
+
+
+def tem_questao_completa(resultado) -> bool:
+    if isinstance(resultado, dict):
+        resultado = [resultado]
+    return any(questao_completa(q) for q in resultado)
+
+
+def merge_perguntas(resultados, total: int = MAX_PERGUNTAS):
+    """Round-robin over the per-chunk results, skipping duplicate questions."""
+    listas = []
+    for resultado in resultados:
+        if isinstance(resultado, dict):
+            resultado = [resultado]
+        listas.append([q for q in resultado if questao_completa(q)])
+
+    # With fewer slots than chunks, visit evenly spaced chunks first so the
+    # selection spans the whole document rather than its opening chunks.
+    ordem = select_chunks(list(range(len(listas))), total)
+    ordem += sorted(set(range(len(listas))) - set(ordem))
+
+    vistas = set()
+    perguntas = []
+    for rodada in range(max((len(lista) for lista in listas), default=0)):
+        for lista in (listas[i] for i in ordem):
+            if rodada >= len(lista):
+                continue
+            questao = lista[rodada]
+            chave = " ".join(questao["texto"].casefold().split())
+            if chave in vistas:
+                continue
+            vistas.add(chave)
+            perguntas.append(questao)
+            if len(perguntas) >= total:
+                return perguntas
+    return perguntas
+
+
+async def generate_perguntas(text: str, total: int = MAX_PERGUNTAS):
+    """Generate questions per chunk concurrently, then merge and dedupe them."""
+    chunks = select_chunks(list(dict.fromkeys(chunk_text(text))))
+    if not chunks:
+        return []
+    # Ask each chunk for a little more than its share to leave room for dedupe.
+    quantidade = min(total, math.ceil(total / len(chunks)) + 1)
+    semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+
+    async def gerar(chunk):
+        async with semaphore:
+            return padronizar_json(await bott(chunk, quantidade=quantidade))
+
+    resultados = await asyncio.gather(
+        *(gerar(chunk) for chunk in chunks), return_exceptions=True
+    )
+    erros = [r for r in resultados if isinstance(r, BaseException)]
+    if len(erros) == len(resultados):
+        raise erros[0]
+    return merge_perguntas(
+        [r for r in resultados if not isinstance(r, BaseException)], total
+    )
+
+
+async def generate_json_pdf(pdf_bytes):
+    text, _ = await asyncio.to_thread(analyze_pdf, pdf_bytes)
+    return await generate_perguntas(text)
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from models.models import LLMCacheEntry, utcnow
+from settings.database import SessionLocal
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so layout-only differences share a cache entry."""
+    return " ".join(text.split())
+
+
+def make_key(text: str, **params) -> str:
+    """Hash the normalized text together with the prompt and sampling params."""
+    material = json.dumps(
+        {"text": normalize_text(text), "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Persistent cache of raw model outputs in the ``llm_cache`` table.
+
+    Entries are evicted least-recently-used first once the stored responses
+    exceed ``max_bytes``. Cache errors are logged and treated as misses.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_bytes=LLM_CACHE_MAX_BYTES):
+        self.session_factory = session_factory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            async with self.session_factory() as db:
+                response = await db.scalar(
+                    select(LLMCacheEntry.response).filter(LLMCacheEntry.key == key)
+                )
+                if response is not None:
+                    await db.execute(
+                        update(LLMCacheEntry)
+                        .where(LLMCacheEntry.key == key)
+                        .values(hits=LLMCacheEntry.hits + 1, last_used_at=utcnow())
+                    )
+                    await db.commit()
+        except Exception:
+            logger.exception("LLM cache lookup failed")
+            response = None
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    async def set(self, key: str, response: str):
+        try:
+            async with self.session_factory() as db:
+                await db.merge(
+                    LLMCacheEntry(
+                        key=key,
+                        response=response,
+                        size=len(response.encode("utf-8")),
+                        hits=0,
+                        created_at=utcnow(),
+                        last_used_at=utcnow(),
+                    )
+                )
+                await db.commit()
+                await self._evict(db)
+        except IntegrityError:
+            # Another worker stored the same key first.
+            pass
+        except Exception:
+            logger.exception("LLM cache store failed")
+
+    async def _evict(self, db):
+        total = await db.scalar(select(func.coalesce(func.sum(LLMCacheEntry.size), 0)))
+        if total <= self.max_bytes:
+            return
+        result = await db.execute(
+            select(LLMCacheEntry.key, LLMCacheEntry.size).order_by(
+                LLMCacheEntry.last_used_at
+            )
+        )
+        stale = []
+        for key, size in result:
+            if total <= self.max_bytes:
+                break
+            stale.append(key)
+            total -= size
+        await db.execute(delete(LLMCacheEntry).where(LLMCacheEntry.key.in_(stale)))
+        await db.commit()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,208 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Every worker writes its own snapshot here; /metrics merges them all, so the
+# totals cover every uvicorn worker without an external collector.
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "brew-metrics")
+)
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# Snapshots not refreshed for this long belong to workers that have exited
+# (or to another container sharing the directory that did); collect drops
+# and deletes them.
+METRICS_STALE_SECONDS = float(os.getenv("METRICS_STALE_SECONDS", "60"))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def new_histogram(buckets):
+    # Per-bucket counts (the last one is +Inf), then sum and count.
+    return {"buckets": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0}
+
+
+def observe(histogram, buckets, value):
+    histogram["buckets"][bisect_left(buckets, value)] += 1
+    histogram["sum"] += value
+    histogram["count"] += 1
+
+
+class Metrics:
+    """Per-worker request and SQL metrics, keyed by method and route template."""
+
+    def __init__(
+        self, directory: str = METRICS_DIR, stale_seconds: float = METRICS_STALE_SECONDS
+    ):
+        self.directory = directory
+        self.stale_seconds = stale_seconds
+        # PIDs repeat across containers sharing the directory, so the file
+        # name also carries a token unique to this process.
+        self.token = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.requests = {}
+        self.routes = {}
+
+    def record(self, method: str, route: str, status: int, seconds: float, stats):
+        key = f"{method} {route} {status}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        route_key = f"{method} {route}"
+        metrics = self.routes.get(route_key)
+        if metrics is None:
+            metrics = self.routes[route_key] = {
+                "latency": new_histogram(LATENCY_BUCKETS),
+                "statements": new_histogram(STATEMENT_BUCKETS),
+                "db_seconds": 0.0,
+            }
+        observe(metrics["latency"], LATENCY_BUCKETS, seconds)
+        observe(metrics["statements"], STATEMENT_BUCKETS, stats.statements)
+        metrics["db_seconds"] += stats.seconds
+
+    def snapshot(self):
+        return {
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "requests": self.requests,
+            "routes": self.routes,
+        }
+
+    def flush(self):
+        """Atomically replace this worker's snapshot file."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{os.getpid()}-{self.token}.json")
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Merge the snapshots of every live worker, including this one.
+
+        Snapshots older than ``stale_seconds`` are deleted instead.
+        """
+        self.flush()
+        requests = {}
+        routes = {}
+        stale_before = time.time() - self.stale_seconds
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("updated_at", 0) < stale_before:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            for key, count in snapshot["requests"].items():
+                requests[key] = requests.get(key, 0) + count
+            for key, metrics in snapshot["routes"].items():
+                merged = routes.get(key)
+                if merged is None:
+                    routes[key] = metrics
+                    continue
+                for name in ("latency", "statements"):
+                    into, other = merged[name], metrics[name]
+                    into["buckets"] = [
+                        a + b for a, b in zip(into["buckets"], other["buckets"])
+                    ]
+                    into["sum"] += other["sum"]
+                    into["count"] += other["count"]
+                merged["db_seconds"] += metrics["db_seconds"]
+        return requests, routes
+
+    def render(self) -> str:
+        """All workers' metrics in the Prometheus text exposition format."""
+        requests, routes = self.collect()
+        lines = [
+            "# HELP http_requests_total HTTP requests by route and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for key, count in sorted(requests.items()):
+            method, route, status = key.split(" ")
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{route}",'
+                f'status="{status}"}} {count}'
+            )
+        histograms = (
+            (
+                "http_request_duration_seconds",
+                "latency",
+                LATENCY_BUCKETS,
+                "Request latency by route.",
+            ),
+            (
+                "db_statements_per_request",
+                "statements",
+                STATEMENT_BUCKETS,
+                "SQL statements executed per request.",
+            ),
+        )
+        for name, field, buckets, help_text in histograms:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for key, metrics in sorted(routes.items()):
+                method, route = key.split(" ")
+                labels = f'method="{method}",route="{route}"'
+                histogram = metrics[field]
+                cumulative = 0
+                for bound, count in zip(
+                    (*map(str, buckets), "+Inf"), histogram["buckets"]
+                ):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+                lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+        lines += [
+            "# HELP db_seconds_total Time spent executing SQL by route.",
+            "# TYPE db_seconds_total counter",
+        ]
+        for key, metrics in sorted(routes.items()):
+            method, route = key.split(" ")
+            lines.append(
+                f'db_seconds_total{{method="{method}",route="{route}"}} '
+                f"{metrics['db_seconds']}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class MetricsFlusher:
+    """Background task that periodically writes this worker's snapshot."""
+
+    def __init__(self, metrics: Metrics, interval: float = METRICS_FLUSH_SECONDS):
+        self.metrics = metrics
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._flush()
+
+    def _flush(self):
+        try:
+            self.metrics.flush()
+        except OSError:
+            logger.exception("Writing metrics snapshot failed")
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self._flush()
+
+
+metrics = Metrics()
+metrics_flusher = MetricsFlusher(metrics)
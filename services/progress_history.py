@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from models.models import UserProgressHistory, utcnow
+from settings.database import SessionLocal
+from sqlalchemy import case, delete, func, insert, select, tuple_
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_HISTORY_ENABLED = os.getenv("PROGRESS_HISTORY_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+PROGRESS_HISTORY_RETENTION_DAYS = int(
+    os.getenv("PROGRESS_HISTORY_RETENTION_DAYS", "30")
+)
+PROGRESS_COMPACT_INTERVAL_SECONDS = 3600
+PROGRESS_COMPACT_BATCH = 5000
+
+
+async def compact_history(
+    db,
+    retention_days: int = PROGRESS_HISTORY_RETENTION_DAYS,
+    batch: int = PROGRESS_COMPACT_BATCH,
+):
+    """Roll history older than the retention window up into one row per fase.
+
+    Handles up to ``batch`` user/fase pairs that still have more than one old
+    row. The rolled-up row keeps the attempt count, best score, whether any
+    attempt completed the fase and the time of the latest attempt. Returns
+    the number of rows removed; call again until it returns 0.
+    """
+    History = UserProgressHistory
+    cutoff = utcnow() - timedelta(days=retention_days)
+    pair = tuple_(History.user_id, History.tema_id, History.fase_id)
+    pairs = (
+        await db.execute(
+            select(History.user_id, History.tema_id, History.fase_id)
+            .filter(History.created_at < cutoff)
+            .group_by(History.user_id, History.tema_id, History.fase_id)
+            .having(func.count() > 1)
+            .limit(batch)
+        )
+    ).all()
+    if not pairs:
+        await db.rollback()
+        return 0
+    # Lock the rows so a concurrent compactor cannot roll them up twice.
+    old = (History.created_at < cutoff, pair.in_([tuple(p) for p in pairs]))
+    ids = (await db.scalars(select(History.id).filter(*old).with_for_update())).all()
+    rows = (
+        await db.execute(
+            select(
+                History.user_id,
+                History.tema_id,
+                History.fase_id,
+                func.sum(History.attempts),
+                func.max(History.score),
+                func.max(case((History.completed, 1), else_=0)),
+                func.max(History.created_at),
+            )
+            .filter(History.id.in_(ids))
+            .group_by(History.user_id, History.tema_id, History.fase_id)
+        )
+    ).all()
+    await db.execute(delete(History).filter(History.id.in_(ids)))
+    await db.execute(
+        insert(History),
+        [
+            {
+                "user_id": user_id,
+                "tema_id": tema_id,
+                "fase_id": fase_id,
+                "attempts": attempts,
+                "score": score,
+                "completed": bool(completed),
+                "created_at": created_at,
+            }
+            for user_id, tema_id, fase_id, attempts, score, completed, created_at in rows
+        ],
+    )
+    await db.commit()
+    return len(ids) - len(rows)
+
+
+class HistoryCompactor:
+    """Background task that periodically runs compact_history."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        interval: float = PROGRESS_COMPACT_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if PROGRESS_HISTORY_ENABLED:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                removed = 0
+                async with self.session_factory() as db:
+                    while compacted := await compact_history(db):
+                        removed += compacted
+                if removed:
+                    logger.info("Compacted %d progress history rows", removed)
+            except Exception:
+                logger.exception("Progress history compaction failed")
+            await asyncio.sleep(self.interval)
+
+
+history_compactor = HistoryCompactor()
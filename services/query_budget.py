@@ -0,0 +1,53 @@
+import logging
+import os
+from contextlib import contextmanager
+
+from settings.database import QueryStats, engine
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Log a possible N+1 when one statement shape runs more than this many times
+# in a single request; 0 turns the check off.
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+
+def report_repeated_queries(
+    method: str, route: str, stats: QueryStats, threshold: int = N_PLUS_ONE_THRESHOLD
+):
+    if threshold <= 0:
+        return
+    for shape, count in stats.repeated(threshold).items():
+        logger.warning(
+            "Possible N+1 in %s %s: query ran %d times: %s", method, route, count, shape
+        )
+
+
+@contextmanager
+def assert_max_queries(limit: int, target=engine):
+    """Fail if the block runs more than ``limit`` SQL statements.
+
+    Counts every statement on ``target``, whichever task or thread issues it,
+    so it also works around requests made through a TestClient::
+
+        with assert_max_queries(2):
+            client.get(f"/temas/{tema_id}")
+    """
+    stats = QueryStats()
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        stats.record(statement)
+
+    event.listen(target.sync_engine, "after_cursor_execute", count)
+    try:
+        yield stats
+    finally:
+        event.remove(target.sync_engine, "after_cursor_execute", count)
+    if stats.statements > limit:
+        shapes = "\n".join(
+            f"  {n}x {shape}"
+            for shape, n in sorted(stats.shapes.items(), key=lambda item: -item[1])
+        )
+        raise AssertionError(
+            f"Expected at most {limit} queries, ran {stats.statements}:\n{shapes}"
+        )
@@ -0,0 +1,64 @@
+from typing import Any, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from schemas import schemas
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by pydantic-core's Rust encoder instead of json.dumps."""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+# Built once at import so no request pays for compiling a list validator.
+LIST_ADAPTERS = {
+    schema: TypeAdapter(List[schema])
+    for schema in (*schemas.TEMA_DEPTHS, *schemas.FASE_DEPTHS, schemas.Pergunta)
+}
+
+
+def list_adapter(schema) -> TypeAdapter:
+    adapter = LIST_ADAPTERS.get(schema)
+    if adapter is None:
+        adapter = LIST_ADAPTERS[schema] = TypeAdapter(List[schema])
+    return adapter
+
+
+def select_view(depths, depth: int, fields: Optional[str], relation: str):
+    """Pick the schema for a ``depth``/``fields`` query.
+
+    Returns (depth, schema, include). When ``fields`` leaves out the child
+    relation, depth drops to 0 so the children are not loaded at all.
+    """
+    if fields is None:
+        return depth, depths[depth], None
+    include = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = include - depths[depth].model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    if relation not in include:
+        depth = 0
+    return depth, depths[depth], include
+
+
+def render(schema, data, include=None) -> Response:
+    """Serialize ORM rows with ``schema``, keeping only ``include`` fields.
+
+    Validation and encoding both happen in pydantic-core, going straight to
+    JSON bytes without an intermediate dict.
+    """
+    if isinstance(data, (list, tuple)):
+        adapter = list_adapter(schema)
+        body = adapter.dump_json(
+            adapter.validate_python(data),
+            include={"__all__": include} if include is not None else None,
+        )
+    else:
+        body = schema.model_validate(data).model_dump_json(include=include)
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# The settings modules read these at import, so set them before the app loads.
+TEST_DIR = tempfile.mkdtemp(prefix="brew-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{TEST_DIR}/test.db"
+os.environ["METRICS_DIR"] = os.path.join(TEST_DIR, "metrics")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from main import app  # noqa: E402
+from migrations.runner import upgrade  # noqa: E402
+from settings.database import engine  # noqa: E402
+
+
+async def _migrate():
+    await upgrade()
+    # The pool belongs to this event loop; the app gets its own.
+    await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client():
+    asyncio.run(_migrate())
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    user = {"username": "tester", "email": "tester@example.com", "password": "secret"}
+    client.post("/users/", json=user)
+    token = client.post(
+        "/token", data={"username": user["username"], "password": user["password"]}
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    # Resolve the token once so the principal cache is warm for every test.
+    client.get("/temas/", headers=headers)
+    return headers
+
+
+@pytest.fixture
+def make_quiz(client, auth_headers):
+    """Create a tema with ``fases`` phases of ``perguntas`` questions each."""
+
+    def make(fases: int = 1, perguntas: int = 1):
+        tema = client.post(
+            "/temas/", json={"nome": "Tema"}, headers=auth_headers
+        ).json()
+        ids = {"tema_id": tema["id"]}
+        for _ in range(fases):
+            fase = client.post(
+                f"/temas/{tema['id']}/fases/",
+                json={"nome": "Fase"},
+                headers=auth_headers,
+            ).json()
+            ids["fase_id"] = fase["id"]
+            for _ in range(perguntas):
+                pergunta = client.post(
+                    f"/fases/{fase['id']}/perguntas/",
+                    json={
+                        "texto": "Pergunta",
+                        "alternativas": [
+                            {"texto": texto, "correta": texto == "a"}
+                            for texto in "abcd"
+                        ],
+                    },
+                    headers=auth_headers,
+                ).json()
+                ids["pergunta_id"] = pergunta["id"]
+                ids["alternativa_id"] = pergunta["alternativas"][0]["id"]
+        return ids
+
+    return make
+
+
+@pytest.fixture
+def quiz(make_quiz):
+    return make_quiz()
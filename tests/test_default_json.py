@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+from services.default_json import MAX_QUESTOES, extrair_questoes, padronizar_json
+
+# Generous for a linear scan of ~1 MB; the scan itself takes milliseconds.
+TIME_LIMIT_SECONDS = 2.0
+
+
+def questao(texto="Qual?", correta=0):
+    return {
+        "texto": texto,
+        "alternativas": [
+            {"texto": f"alt {i}", "correta": i == correta} for i in range(4)
+        ],
+    }
+
+
+def test_parses_a_json_list():
+    saida = json.dumps([questao("Um"), questao("Dois")])
+    assert [q["texto"] for q in padronizar_json(saida)] == ["Um", "Dois"]
+
+
+def test_skips_prose_around_the_json():
+    saida = f"Claro! Aqui estão as perguntas:\n```json\n{json.dumps(questao())}\n```"
+    assert padronizar_json(saida) == [questao()]
+
+
+def test_recovers_missing_commas_between_alternatives():
+    saida = """
+    {"texto": "Capital do Brasil?",
+        "alternativas": [
+            {"texto": "Brasília", "correta": true}
+            {"texto": "Rio", "correta": false}
+            {"texto": "São Paulo", "correta": false}
+            {"texto": "Salvador", "correta": false}
+        ]
+    }
+    """
+    [resultado] = extrair_questoes(saida)
+    assert resultado["texto"] == "Capital do Brasil?"
+    assert [alt["texto"] for alt in resultado["alternativas"]] == [
+        "Brasília",
+        "Rio",
+        "São Paulo",
+        "Salvador",
+    ]
+
+
+def test_braces_inside_strings():
+    texto = 'O que {"texto": } e {} significam?'
+    saida = json.dumps([questao(texto)])
+    [resultado] = extrair_questoes(saida)
+    assert resultado["texto"] == texto
+
+
+def test_caps_at_max_questoes():
+    saida = json.dumps([questao(f"Pergunta {i}") for i in range(MAX_QUESTOES * 3)])
+    assert len(extrair_questoes(saida)) == MAX_QUESTOES
+
+
+def test_structured_input_is_normalized():
+    assert padronizar_json([questao()] * 20) == [questao()] * MAX_QUESTOES
+    assert padronizar_json(questao()) == questao()
+
+
+def test_unusable_output_yields_an_empty_question():
+    assert padronizar_json("não sei") == {"texto": "", "alternativas": []}
+
+
+MB = 1024 * 1024
+
+ADVERSARIAL = {
+    "truncated": json.dumps([questao(f"P{i}") for i in range(5)])[:-40],
+    "megabyte_of_text": "lorem ipsum " * (MB // 12),
+    "unbalanced_open_braces": "{" * MB,
+    "repeated_question_starts": '{"texto": ' * (MB // 10),
+    "deep_nesting": '{"texto": "x", "alternativas": ' + "[" * (MB // 2),
+    "unterminated_string": '{"texto": "' + "a" * MB,
+    "missing_commas_everywhere": '{"texto": "q" "alternativas": [] }' * (MB // 34),
+}
+
+
+@pytest.mark.parametrize("nome", ADVERSARIAL)
+def test_adversarial_input_runs_in_bounded_time(nome):
+    start = time.perf_counter()
+    resultado = padronizar_json(ADVERSARIAL[nome])
+    assert time.perf_counter() - start < TIME_LIMIT_SECONDS
+    assert resultado is not None
+
+
+def test_truncated_output_keeps_the_complete_questions():
+    resultado = padronizar_json(ADVERSARIAL["truncated"])
+    assert [q["texto"] for q in resultado] == ["P0", "P1", "P2", "P3"]
@@ -0,0 +1,30 @@
+import pytest
+from services.query_budget import assert_max_queries
+
+# Endpoints that serialize a nested tema -> fase -> pergunta -> alternativa
+# tree; each declares its loading strategy in the controller.
+TREE_READS = [
+    "/temas/",
+    "/temas/{tema_id}",
+    "/temas/{tema_id}/fases/",
+    "/fases/{fase_id}",
+    "/fases/{fase_id}/perguntas/",
+    "/perguntas/{pergunta_id}",
+    "/fases/{fase_id}/play",
+]
+# A whole tree loads in a fixed, small number of statements.
+MAX_TREE_QUERIES = 5
+
+
+@pytest.mark.parametrize("path", TREE_READS)
+def test_read_queries_do_not_grow_with_data(client, auth_headers, make_quiz, path):
+    counts = []
+    for size in (1, 5):
+        quiz = make_quiz(fases=size, perguntas=size)
+        with assert_max_queries(MAX_TREE_QUERIES) as stats:
+            response = client.get(path.format(**quiz), headers=auth_headers)
+        assert response.status_code == 200
+        # No lazy load per row: every statement shape runs once.
+        assert stats.repeated(1) == {}
+        counts.append(stats.statements)
+    assert counts[0] == counts[1]
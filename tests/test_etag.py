@@ -0,0 +1,36 @@
+def test_reused_tema_id_does_not_match_old_etag(client, auth_headers):
+    old = client.post("/temas/", json={"nome": "Old"}, headers=auth_headers).json()
+    list_etag = client.get("/temas/", headers=auth_headers).headers["etag"]
+    tema_etag = client.get(f"/temas/{old['id']}", headers=auth_headers).headers["etag"]
+
+    client.delete(f"/temas/{old['id']}", headers=auth_headers)
+    new = client.post("/temas/", json={"nome": "BrandNew"}, headers=auth_headers)
+    # SQLite hands the highest rowid out again once it has been deleted.
+    assert new.json()["id"] == old["id"]
+
+    response = client.get(
+        f"/temas/{old['id']}", headers={**auth_headers, "If-None-Match": tema_etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["nome"] == "BrandNew"
+    response = client.get(
+        "/temas/", headers={**auth_headers, "If-None-Match": list_etag}
+    )
+    assert response.status_code == 200
+
+
+def test_unchanged_tema_revalidates(client, auth_headers, quiz):
+    url = f"/temas/{quiz['tema_id']}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_write_below_tema_changes_etag(client, auth_headers, quiz):
+    url = f"/temas/{quiz['tema_id']}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    client.put(
+        f"/fases/{quiz['fase_id']}", json={"nome": "Renamed"}, headers=auth_headers
+    )
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+import pytest
+from auth.hashing import PasswordHasher
+from fastapi import HTTPException
+
+
+def test_run_returns_result_off_the_event_loop():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    loop_thread = threading.get_ident()
+    try:
+        worker_thread = asyncio.run(hasher.run(threading.get_ident))
+    finally:
+        hasher.shutdown()
+    assert worker_thread != loop_thread
+    assert hasher.stats()["pending"] == 0
+
+
+def test_run_rejects_with_503_once_max_pending_is_reached():
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert hasher.stats() == {
+            "workers": 1,
+            "pending": 2,
+            "queued": 1,
+            "rejected": 0,
+        }
+        with pytest.raises(HTTPException) as rejected:
+            await hasher.run(release.wait)
+        release.set()
+        await asyncio.gather(*blocked)
+        return rejected.value
+
+    try:
+        error = asyncio.run(scenario())
+    finally:
+        release.set()
+        hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "1"}
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["pending"] == 0
@@ -0,0 +1,81 @@
+import uuid
+from datetime import timedelta
+
+import services.jobs as jobs
+from models.models import Job, Pergunta, utcnow
+from settings.database import SessionLocal
+from sqlalchemy import func, select, update
+
+QUESTIONS = [
+    {
+        "texto": "Pergunta",
+        "alternativas": [{"texto": t, "correta": t == "a"} for t in "abcd"],
+    }
+]
+
+
+def run_job(client, monkeypatch, fase_id, owner_id, generate):
+    """Run one claimed job through JobQueue._run with a stubbed generator."""
+    monkeypatch.setattr(jobs, "generate_json_pdf", generate)
+    job_id = uuid.uuid4().hex
+
+    async def run():
+        async with SessionLocal() as db:
+            # Claimed and leased far ahead, so the app's own workers skip it.
+            db.add(
+                Job(
+                    id=job_id,
+                    owner_id=owner_id,
+                    fase_id=fase_id,
+                    status=jobs.RUNNING,
+                    attempts=1,
+                    payload=b"%PDF",
+                    run_after=utcnow() + timedelta(hours=1),
+                )
+            )
+            await db.commit()
+        await jobs.JobQueue()._run(job_id)
+        async with SessionLocal() as db:
+            job = await db.get(Job, job_id)
+            count = await db.scalar(
+                select(func.count(Pergunta.id)).filter(Pergunta.fase_id == fase_id)
+            )
+            return job, count
+
+    return client.portal.call(run)
+
+
+def owner_id(client, auth_headers):
+    return client.get("/users/me/", headers=auth_headers).json()["id"]
+
+
+def test_job_commits_questions_with_done(client, auth_headers, quiz, monkeypatch):
+    async def generate(payload):
+        return QUESTIONS
+
+    job, count = run_job(
+        client, monkeypatch, quiz["fase_id"], owner_id(client, auth_headers), generate
+    )
+    assert job.status == jobs.DONE
+    assert len(job.pergunta_ids) == 1
+    assert count == 2
+
+
+def test_reclaimed_job_discards_its_questions(client, auth_headers, quiz, monkeypatch):
+    async def generate(payload):
+        # Another worker reclaims the job while this run is generating.
+        async with SessionLocal() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.status == jobs.RUNNING)
+                .values(attempts=Job.attempts + 1)
+            )
+            await db.commit()
+        return QUESTIONS
+
+    job, count = run_job(
+        client, monkeypatch, quiz["fase_id"], owner_id(client, auth_headers), generate
+    )
+    assert job.status == jobs.RUNNING
+    assert job.pergunta_ids in (None, [])
+    assert count == 1
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import re
+import threading
+
+import pytest
+import services.json_llm as json_llm
+from services.json_llm import chunk_text, merge_perguntas, select_chunks
+
+
+def questao(texto, correta=0, alternativas=4):
+    return {
+        "texto": texto,
+        "alternativas": [
+            {"texto": f"alt {i}", "correta": i == correta} for i in range(alternativas)
+        ],
+    }
+
+
+class NullCache:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value):
+        pass
+
+
+def test_chunk_text_respects_the_budget_and_keeps_every_word():
+    words = [f"palavra{i}" for i in range(1000)]
+    chunks = chunk_text(" ".join(words), max_tokens=50)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 50 * json_llm.CHARS_PER_TOKEN for chunk in chunks)
+    assert " ".join(chunks).split() == words
+
+
+def test_chunk_text_edge_cases():
+    assert chunk_text("") == []
+    assert chunk_text("   \n\t ") == []
+    assert chunk_text("curto e simples") == ["curto e simples"]
+    # A single word longer than the budget still gets its own chunk.
+    longa = "x" * 500
+    assert chunk_text(f"a {longa} b", max_tokens=10) == ["a", longa, "b"]
+
+
+def test_select_chunks_spreads_over_the_document():
+    chunks = [str(i) for i in range(100)]
+    assert select_chunks(chunks[:5], max_chunks=10) == chunks[:5]
+    selected = select_chunks(chunks, max_chunks=10)
+    assert selected == [str(i) for i in range(0, 100, 10)]
+
+
+def test_merge_dedupes_and_drops_incomplete_questions():
+    resultados = [
+        [questao("Qual é a capital?"), questao("Incompleta", alternativas=3)],
+        [questao("  qual é a   CAPITAL? "), questao("Outra")],
+        questao("Sozinha"),
+    ]
+    textos = [q["texto"] for q in merge_perguntas(resultados, total=10)]
+    assert textos == ["Qual é a capital?", "Sozinha", "Outra"]
+
+
+def test_merge_caps_at_total_and_round_robins():
+    resultados = [[questao(f"{c}{i}") for i in range(5)] for c in "abc"]
+    textos = [q["texto"] for q in merge_perguntas(resultados, total=4)]
+    assert textos == ["a0", "b0", "c0", "a1"]
+
+
+def test_merge_spreads_a_short_selection_over_every_chunk():
+    resultados = [[questao(f"chunk {i}")] for i in range(18)]
+    textos = [q["texto"] for q in merge_perguntas(resultados, total=9)]
+    assert textos == [f"chunk {i}" for i in range(0, 18, 2)]
+
+
+def test_generate_perguntas_bounds_concurrency_and_covers_every_chunk(monkeypatch):
+    monkeypatch.setattr(json_llm, "llm_cache", NullCache())
+    lock = threading.Lock()
+    running = peak = 0
+    seen = []
+
+    def predict(prompt):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        try:
+            secoes = re.findall(r"secao(\d+)", prompt)
+            seen.extend(secoes)
+            threading.Event().wait(0.01)
+            return json.dumps([questao(f"Pergunta da seção {s}") for s in secoes])
+        finally:
+            with lock:
+                running -= 1
+
+    monkeypatch.setattr(json_llm, "predict", predict)
+    text = " ".join(f"secao{i} " + "texto " * 300 for i in range(40))
+    assert len(chunk_text(text)) > json_llm.LLM_CONCURRENCY
+
+    perguntas = asyncio.run(
+        json_llm.generate_perguntas(text, total=json_llm.MAX_PERGUNTAS)
+    )
+
+    assert peak <= json_llm.LLM_CONCURRENCY
+    assert len(perguntas) == json_llm.MAX_PERGUNTAS
+    assert set(seen) == {str(i) for i in range(40)}
+
+
+def test_generate_perguntas_tolerates_failed_chunks(monkeypatch):
+    monkeypatch.setattr(json_llm, "llm_cache", NullCache())
+
+    def predict(prompt):
+        if "secao0" in prompt:
+            raise RuntimeError("remote down")
+        return json.dumps([questao("Pergunta")])
+
+    monkeypatch.setattr(json_llm, "predict", predict)
+    text = " ".join(f"secao{i} " + "texto " * 1500 for i in range(2))
+    assert [q["texto"] for q in asyncio.run(json_llm.generate_perguntas(text))] == [
+        "Pergunta"
+    ]
+
+    monkeypatch.setattr(json_llm, "predict", lambda prompt: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(json_llm.generate_perguntas(text))
@@ -0,0 +1,42 @@
+import json
+import os
+import time
+
+from services.metrics import Metrics
+from settings.database import QueryStats
+
+
+def write_snapshot(directory, name, updated_at, count):
+    with open(os.path.join(directory, name), "w") as f:
+        json.dump(
+            {
+                "started_at": updated_at,
+                "updated_at": updated_at,
+                "requests": {"GET /temas/ 200": count},
+                "routes": {},
+            },
+            f,
+        )
+
+
+def test_collect_merges_live_and_drops_stale_snapshots(tmp_path):
+    metrics = Metrics(str(tmp_path), stale_seconds=60)
+    metrics.record("GET", "/temas/", 200, 0.01, QueryStats())
+    write_snapshot(tmp_path, "7-live.json", time.time(), 2)
+    write_snapshot(tmp_path, "7-dead.json", time.time() - 120, 5)
+
+    requests, routes = metrics.collect()
+
+    assert requests == {"GET /temas/ 200": 3}
+    assert routes["GET /temas/"]["latency"]["count"] == 1
+    assert not (tmp_path / "7-dead.json").exists()
+
+
+def test_same_pid_in_two_processes_keeps_both_snapshots(tmp_path):
+    first, second = Metrics(str(tmp_path)), Metrics(str(tmp_path))
+    for metrics in (first, second):
+        metrics.record("GET", "/temas/", 200, 0.01, QueryStats())
+        metrics.flush()
+
+    requests, _ = first.collect()
+    assert requests == {"GET /temas/ 200": 2}
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from migrations import runner
+from migrations.versions import v0004_progress_best_score as v0004
+from sqlalchemy import create_engine, inspect, select
+
+
+def test_status_check_does_not_create_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    with engine.connect() as conn:
+        assert runner._applied_versions(conn) == set()
+        assert not inspect(conn).has_table("schema_migrations")
+    engine.dispose()
+
+
+def test_schema_is_up_to_date(client):
+    pending = client.portal.call(runner.pending_migrations)
+    assert pending == []
+
+
+def test_progress_backfill_dates_every_history_row(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'progress.db'}")
+    completed_at = datetime(2024, 1, 2, 3, 4, 5)
+    with engine.begin() as conn:
+        v0004.metadata.create_all(conn, tables=[v0004.user_progress])
+        conn.execute(
+            v0004.user_progress.insert(),
+            [
+                {
+                    "user_id": 1,
+                    "fase_id": 1,
+                    "score": 3,
+                    "completed": True,
+                    "date_completed": completed_at,
+                },
+                {
+                    "user_id": 1,
+                    "fase_id": 2,
+                    "score": 1,
+                    "completed": False,
+                    "date_completed": None,
+                },
+            ],
+        )
+        v0004.upgrade(conn)
+        history = v0004.user_progress_history.c
+        dates = dict(conn.execute(select(history.fase_id, history.created_at)).all())
+    engine.dispose()
+
+    assert dates[1] == completed_at
+    assert dates[2] is not None
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def post_progress(client, auth_headers, quiz, score=1):
+    progress = {
+        "tema_id": quiz["tema_id"],
+        "fase_id": quiz["fase_id"],
+        "completed": True,
+        "score": score,
+    }
+    return client.post("/progress/", json=progress, headers=auth_headers)
+
+
+def summary_for(client, auth_headers, tema_id):
+    summary = client.get("/progress/summary", headers=auth_headers).json()
+    return next(row for row in summary if row["tema_id"] == tema_id)
+
+
+def test_repeated_completion_counts_once(client, auth_headers, quiz):
+    for score in (1, 3, 2):
+        response = post_progress(client, auth_headers, quiz, score)
+    assert response.json()["score"] == 3
+    assert response.json()["completed"] is True
+
+    summary = summary_for(client, auth_headers, quiz["tema_id"])
+    assert summary["attempts"] == 3
+    assert summary["completed_fases"] == 1
+
+
+def test_concurrent_completions_count_once(client, auth_headers, quiz):
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: post_progress(client, auth_headers, quiz), range(8)))
+
+    summary = summary_for(client, auth_headers, quiz["tema_id"])
+    assert summary["attempts"] == 8
+    assert summary["completed_fases"] == 1
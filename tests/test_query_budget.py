@@ -0,0 +1,122 @@
+import logging
+
+import pytest
+from services.query_budget import assert_max_queries, report_repeated_queries
+from settings.database import QueryStats, statement_shape
+
+READ_BUDGETS = [
+    ("/temas/", 5),
+    ("/temas/{tema_id}", 5),
+    ("/temas/{tema_id}/fases/", 4),
+    ("/fases/{fase_id}", 4),
+    ("/fases/{fase_id}/perguntas/", 3),
+    ("/perguntas/{pergunta_id}", 3),
+    ("/fases/{fase_id}/play", 3),
+    ("/progress/summary", 1),
+]
+
+
+@pytest.mark.parametrize("path,budget", READ_BUDGETS)
+def test_read_budget(client, auth_headers, quiz, path, budget):
+    with assert_max_queries(budget):
+        response = client.get(path.format(**quiz), headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "path", ["/temas/{tema_id}", "/fases/{fase_id}", "/perguntas/{pergunta_id}"]
+)
+def test_not_modified_budget(client, auth_headers, quiz, path):
+    url = path.format(**quiz)
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    with assert_max_queries(1):
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+ALTERNATIVAS = [{"texto": texto, "correta": texto == "a"} for texto in "abcd"]
+
+WRITE_BUDGETS = [
+    ("POST", "/temas/", {"nome": "Novo"}, 4),
+    ("PUT", "/temas/{tema_id}", {"nome": "Outro"}, 7),
+    ("POST", "/temas/{tema_id}/fases/", {"nome": "Nova"}, 6),
+    ("PUT", "/fases/{fase_id}", {"nome": "Outra"}, 6),
+    (
+        "POST",
+        "/fases/{fase_id}/perguntas/",
+        {"texto": "Nova", "alternativas": ALTERNATIVAS},
+        8,
+    ),
+    (
+        "PUT",
+        "/perguntas/{pergunta_id}",
+        {"texto": "Outra", "alternativas": ALTERNATIVAS},
+        10,
+    ),
+    ("DELETE", "/perguntas/{pergunta_id}", None, 6),
+]
+
+
+@pytest.mark.parametrize("method,path,body,budget", WRITE_BUDGETS)
+def test_write_budget(client, auth_headers, quiz, method, path, body, budget):
+    with assert_max_queries(budget):
+        response = client.request(
+            method, path.format(**quiz), json=body, headers=auth_headers
+        )
+    assert response.status_code == 200
+
+
+def test_check_budget(client, auth_headers, quiz):
+    url = f"/perguntas/{quiz['pergunta_id']}/check"
+    params = {"alternativa_id": quiz["alternativa_id"]}
+    # Once to load the answer key, then again to hit the cached entry.
+    for _ in range(2):
+        with assert_max_queries(1):
+            response = client.post(url, params=params, headers=auth_headers)
+        assert response.json() == {"correta": True}
+
+
+def test_play_budget(client, auth_headers, quiz):
+    respostas = [
+        {"pergunta_id": quiz["pergunta_id"], "alternativa_id": quiz["alternativa_id"]}
+    ]
+    with assert_max_queries(6):
+        response = client.post(
+            f"/fases/{quiz['fase_id']}/play",
+            json={"respostas": respostas},
+            headers=auth_headers,
+        )
+    assert response.json()["score"] == 1
+
+
+def test_progress_budget(client, auth_headers, quiz):
+    progress = {
+        "tema_id": quiz["tema_id"],
+        "fase_id": quiz["fase_id"],
+        "completed": True,
+        "score": 3,
+    }
+    with assert_max_queries(6):
+        response = client.post("/progress/", json=progress, headers=auth_headers)
+    assert response.status_code == 200
+
+
+def test_assert_max_queries_reports_shapes(client, auth_headers, quiz):
+    with pytest.raises(AssertionError, match="at most 1 queries"):
+        with assert_max_queries(1):
+            client.get(f"/temas/{quiz['tema_id']}", headers=auth_headers)
+
+
+def test_statement_shape_ignores_values():
+    assert statement_shape(
+        "SELECT * FROM t WHERE id = 1 AND x IN (?, ?, ?) AND s = 'a'"
+    ) == statement_shape("SELECT * FROM t WHERE id = 22 AND x IN (?) AND s = 'bc'")
+
+
+def test_repeated_shape_is_logged(caplog):
+    stats = QueryStats()
+    for pergunta_id in range(6):
+        stats.record(f"SELECT * FROM alternativas WHERE pergunta_id = {pergunta_id}")
+    with caplog.at_level(logging.WARNING, logger="services.query_budget"):
+        report_repeated_queries("GET", "/temas/{tema_id}", stats, threshold=5)
+    assert "Possible N+1" in caplog.text
@@ -0,0 +1,146 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+from services.jobs import JobQueue
+from settings.database import engine
+from sqlalchemy import event
+
+pytestmark = pytest.mark.skipif(
+    engine.dialect.name != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite syntax"
+)
+
+# A plan step reading a whole table, as opposed to SEARCH ... USING INDEX.
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$")
+
+
+@contextmanager
+def capture_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith(("SELECT", "UPDATE", "DELETE")):
+            # Every row of an executemany shares one plan.
+            statements.append((statement, parameters[0] if executemany else parameters))
+
+    event.listen(engine.sync_engine, "after_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "after_cursor_execute", capture)
+
+
+def query_plan(client, statement, parameters):
+    async def explain():
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            return [row[-1] for row in result]
+
+    return client.portal.call(explain)
+
+
+def full_scans(client, statements):
+    plans = {
+        statement: query_plan(client, statement, parameters)
+        for statement, parameters in statements
+    }
+    return {
+        statement: steps
+        for statement, steps in plans.items()
+        if any(FULL_SCAN.match(step) for step in steps)
+    }
+
+
+@pytest.mark.parametrize(
+    "path,table,index",
+    [
+        ("/temas/", "temas", "ix_temas_owner_id_id"),
+        ("/temas/{tema_id}/fases/", "fases", "ix_fases_tema_id_id"),
+        ("/fases/{fase_id}/perguntas/", "perguntas", "ix_perguntas_fase_id_id"),
+    ],
+)
+def test_paged_lists_use_composite_index(
+    client, auth_headers, quiz, path, table, index
+):
+    with capture_statements() as statements:
+        client.get(path.format(**quiz), params={"limit": 10}, headers=auth_headers)
+    paged = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if f"FROM {table}" in statement and "LIMIT" in statement
+    ]
+    assert paged
+    for statement, parameters in paged:
+        steps = query_plan(client, statement, parameters)
+        assert f"SEARCH {table} USING INDEX {index}" in " | ".join(steps)
+
+
+READS = [
+    "/temas/",
+    "/temas/{tema_id}",
+    "/temas/{tema_id}/fases/",
+    "/fases/{fase_id}",
+    "/fases/{fase_id}/perguntas/",
+    "/perguntas/{pergunta_id}",
+    "/fases/{fase_id}/play",
+    "/progress/",
+    "/progress/summary",
+]
+
+
+@pytest.mark.parametrize("path", READS)
+def test_reads_avoid_full_scans(client, auth_headers, quiz, path):
+    url = path.format(**quiz)
+    with capture_statements() as statements:
+        etag = client.get(url, headers=auth_headers).headers.get("etag")
+        if etag:
+            # The version lookup behind a 304.
+            client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert statements
+    assert full_scans(client, statements) == {}
+
+
+def test_writes_avoid_full_scans(client, auth_headers, quiz):
+    respostas = [
+        {"pergunta_id": quiz["pergunta_id"], "alternativa_id": quiz["alternativa_id"]}
+    ]
+    with capture_statements() as statements:
+        client.post(
+            f"/perguntas/{quiz['pergunta_id']}/check",
+            params={"alternativa_id": quiz["alternativa_id"]},
+            headers=auth_headers,
+        )
+        client.post(
+            f"/fases/{quiz['fase_id']}/play",
+            json={"respostas": respostas},
+            headers=auth_headers,
+        )
+        client.post(
+            "/progress/",
+            json={
+                "tema_id": quiz["tema_id"],
+                "fase_id": quiz["fase_id"],
+                "completed": True,
+                "score": 1,
+            },
+            headers=auth_headers,
+        )
+        client.put(
+            f"/perguntas/{quiz['pergunta_id']}",
+            json={
+                "texto": "Outra",
+                "alternativas": [{"texto": t, "correta": t == "a"} for t in "abcd"],
+            },
+            headers=auth_headers,
+        )
+        client.delete(f"/fases/{quiz['fase_id']}", headers=auth_headers)
+    assert full_scans(client, statements) == {}
+
+
+def test_job_claim_avoids_full_scans(client):
+    with capture_statements() as statements:
+        client.portal.call(JobQueue()._claim_next)
+    assert statements
+    assert full_scans(client, statements) == {}